@@ -51,7 +51,12 @@ Usage:
     python ics_live_test.py examples/payments-platform.ics --provider ollama --model llama3.2
 
     python ics_live_test.py --invocations 5
+    python ics_live_test.py --invocations 5 --naive-calls 5   # measure every naive call
+    python ics_live_test.py --invocations 20 --concurrency 4  # at most 4 requests in flight
+    python ics_live_test.py --warmup 1     # one unreported ICS call warms the cache first
+    python ics_live_test.py --force        # run all N even below Anthropic's cache threshold
     python ics_live_test.py --dry-run      # preview requests, no API calls
+    python ics_live_test.py --reuse-results  # reuse results from the last 5 minutes
 
 Requirements:
     pip install anthropic          # for Anthropic provider
@@ -60,15 +65,19 @@ Requirements:
 """
 
 import argparse
+import io
 import json
 import os
+import re
 import sys
+import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, replace
+from functools import partial
+from operator import attrgetter
 
-sys.path.insert(0, __file__.rsplit("/", 1)[0])
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from ics_validator import parse_layers, LAYER_ORDER
-from ics_token_analyzer import EXAMPLE_REFACTORING, count_tokens_word_boundary
 
 # ---------------------------------------------------------------------------
 # Layer lifetime groups (from §2.4)
@@ -78,6 +87,11 @@ PERMANENT  = {"IMMUTABLE_CONTEXT", "CAPABILITY_DECLARATION"}
 SESSION    = {"SESSION_STATE"}
 INVOCATION = {"TASK_PAYLOAD", "OUTPUT_CONTRACT"}
 
+# Each group's layer names in LAYER_ORDER, resolved once at import time.
+PERMANENT_ORDER  = tuple(n for n in LAYER_ORDER if n in PERMANENT)
+SESSION_ORDER    = tuple(n for n in LAYER_ORDER if n in SESSION)
+INVOCATION_ORDER = tuple(n for n in LAYER_ORDER if n in INVOCATION)
+
 # Minimum tokens Anthropic requires in the cached block for caching to activate.
 # Verified empirically: claude-haiku-4-5-20251001 requires ≥ ~4096 tokens.
 # (Claude 3 models required 1024; Claude 3.5 models required 2048.)
@@ -133,11 +147,43 @@ OLLAMA_PRICING = {
 }
 
 
+def pricing_for(model: str, provider: str = "anthropic") -> dict:
+    """Per-million-token prices for `model`, falling back to the provider default."""
+    table = {
+        "openai": OPENAI_PRICING,
+        "gemini": GEMINI_PRICING,
+        "ollama": OLLAMA_PRICING,
+    }.get(provider, ANTHROPIC_PRICING)
+    return table.get(model, table["default"])
+
+
+def make_cost_fn(model: str, provider: str = "anthropic"):
+    """
+    Return cost(input, cache_write, cache_read, output) -> USD for `model`.
+
+    Prices are looked up once and bound as closure locals, so pricing many
+    usage rows doesn't repeat the table lookup for each one.
+    """
+    p = pricing_for(model, provider)
+    p_input, p_write = p["input"], p.get("cache_write", 0)
+    p_read,  p_output = p["cache_read"], p["output"]
+
+    def cost(input_tokens: int, cache_write: int, cache_read: int, output: int) -> float:
+        return (
+            input_tokens  * p_input
+            + cache_write * p_write
+            + cache_read  * p_read
+            + output      * p_output
+        ) / 1_000_000
+
+    return cost
+
+
 # ---------------------------------------------------------------------------
 # Data types
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class InvocationUsage:
     invocation: int
     approach: str  # "naive" or "ics"
@@ -160,46 +206,61 @@ class InvocationUsage:
 
     def cost(self, model: str, provider: str = "anthropic") -> float:
         """Estimated USD cost for this invocation."""
-        if provider == "openai":
-            table = OPENAI_PRICING
-        elif provider == "gemini":
-            table = GEMINI_PRICING
-        elif provider == "ollama":
-            table = OLLAMA_PRICING
-        else:
-            table = ANTHROPIC_PRICING
-        p = table.get(model, table["default"])
-        return (
-            self.input_tokens                  * p["input"]
-            + self.cache_creation_input_tokens * p.get("cache_write", 0)
-            + self.cache_read_input_tokens     * p["cache_read"]
-            + self.output_tokens               * p["output"]
-        ) / 1_000_000
+        return make_cost_fn(model, provider)(
+            self.input_tokens,
+            self.cache_creation_input_tokens,
+            self.cache_read_input_tokens,
+            self.output_tokens,
+        )
 
 
 # ---------------------------------------------------------------------------
 # System-prompt builders
 # ---------------------------------------------------------------------------
 
+_LAYER_BLOCK = "###ICS:{0}###\n{1}\n###END:{0}###".format
+
+
 def _layer_block(name: str, content: str) -> str:
-    return f"###ICS:{name}###\n{content}\n###END:{name}###"
+    return _LAYER_BLOCK(name, content)
 
 
-def build_naive_system(layer_map: dict) -> str:
+def _render_group(layer_map: dict, order: tuple) -> str:
+    """Boundary-tagged blocks of the `order` layers present in `layer_map`."""
+    return "\n\n".join([
+        _layer_block(name, layer_map[name].content)
+        for name in order
+        if name in layer_map
+    ])
+
+
+def render_groups(layer_map: dict) -> tuple[str, str, str]:
+    """
+    Render the permanent, session and invocation groups of `layer_map` once.
+
+    Every builder (and the permanent-block token count in run()) works from
+    these three strings, so the naive and ICS prompts cannot disagree about
+    which layers belong where. An absent group renders as "".
+    """
+    return (
+        _render_group(layer_map, PERMANENT_ORDER),
+        _render_group(layer_map, SESSION_ORDER),
+        _render_group(layer_map, INVOCATION_ORDER),
+    )
+
+
+def build_naive_system(layer_map: dict, rendered: tuple | None = None) -> str:
     """
     Naive: all layers joined into one flat string.
     No cache markup — the full context is charged at the input token rate
     on every invocation.
+
+    `rendered` is an optional precomputed render_groups(layer_map).
     """
-    parts = [
-        _layer_block(name, layer_map[name].content)
-        for name in LAYER_ORDER
-        if name in layer_map
-    ]
-    return "\n\n".join(parts)
+    return "\n\n".join([text for text in rendered or render_groups(layer_map) if text])
 
 
-def build_ics_system(layer_map: dict) -> list:
+def build_ics_system(layer_map: dict, rendered: tuple | None = None) -> list:
     """
     ICS: system prompt as a list of content blocks.
 
@@ -210,46 +271,32 @@ def build_ics_system(layer_map: dict) -> list:
     Block 2 (session layer) — plain text, no caching.
 
     Block 3 (invocation layers) — plain text, no caching.
+
+    `rendered` is an optional precomputed render_groups(layer_map).
     """
+    perm_text, sess_text, inv_text = rendered or render_groups(layer_map)
     blocks = []
 
     # Block 1: permanent layers (cacheable)
-    perm_parts = [
-        _layer_block(name, layer_map[name].content)
-        for name in LAYER_ORDER
-        if name in layer_map and name in PERMANENT
-    ]
-    if perm_parts:
+    if perm_text:
         blocks.append({
             "type": "text",
-            "text": "\n\n".join(perm_parts),
+            "text": perm_text,
             "cache_control": {"type": "ephemeral"},
         })
 
     # Block 2: session layer
-    for name in LAYER_ORDER:
-        if name in layer_map and name in SESSION:
-            blocks.append({
-                "type": "text",
-                "text": _layer_block(name, layer_map[name].content),
-            })
+    if sess_text:
+        blocks.append({"type": "text", "text": sess_text})
 
     # Block 3: invocation layers
-    inv_parts = [
-        _layer_block(name, layer_map[name].content)
-        for name in LAYER_ORDER
-        if name in layer_map and name in INVOCATION
-    ]
-    if inv_parts:
-        blocks.append({
-            "type": "text",
-            "text": "\n\n".join(inv_parts),
-        })
+    if inv_text:
+        blocks.append({"type": "text", "text": inv_text})
 
     return blocks
 
 
-def build_ics_system_flat(layer_map: dict) -> str:
+def build_ics_system_flat(layer_map: dict, rendered: tuple | None = None) -> str:
     """
     ICS for OpenAI: flat string with permanent layers grouped first.
 
@@ -261,16 +308,10 @@ def build_ics_system_flat(layer_map: dict) -> str:
       [permanent layers]   ← stable prefix; auto-cached by OpenAI
       [session layer]      ← changes per session
       [invocation layers]  ← changes every call
+
+    `rendered` is an optional precomputed render_groups(layer_map).
     """
-    parts = []
-    for group in (PERMANENT, SESSION, INVOCATION):
-        group_parts = [
-            _layer_block(name, layer_map[name].content)
-            for name in LAYER_ORDER
-            if name in layer_map and name in group
-        ]
-        parts.extend(group_parts)
-    return "\n\n".join(parts)
+    return "\n\n".join([text for text in rendered or render_groups(layer_map) if text])
 
 
 # ---------------------------------------------------------------------------
@@ -282,6 +323,99 @@ USER_MESSAGE = (
     "and return the result per OUTPUT_CONTRACT."
 )
 
+# Fields copied verbatim from the Anthropic response's usage object.
+ANTHROPIC_USAGE_FIELDS = (
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+# USER_MESSAGE never changes, so the Anthropic messages list is built once.
+ANTHROPIC_MESSAGES = [{"role": "user", "content": USER_MESSAGE}]
+
+
+def system_preview(system) -> str:
+    """
+    Dry-run preview of a system prompt: the first 400 characters, indented,
+    plus a note on how much was cut.  Content-block lists are shown as JSON.
+    """
+    if isinstance(system, str):
+        preview = "    " + system[:400].replace("\n", "\n      ")
+        if len(system) > 400:
+            preview += f"\n    ... ({len(system) - 400} more chars)"
+        return preview
+    return "    " + json.dumps(system, indent=2)[:400]
+
+
+# Longest pause the pacer will take on a single reset hint, in seconds.
+MAX_PACE_SECONDS = 60.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNIT = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _reset_seconds(value: str) -> float | None:
+    """
+    Seconds until a rate-limit window resets, from a reset header value.
+
+    Anthropic sends an RFC 3339 timestamp ("2025-01-01T00:00:30Z"); OpenAI
+    sends a duration ("1s", "6m0s", "20ms").  Returns None if unparseable.
+    """
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + unit for n, unit in parts) == value.strip():
+        return sum(float(n) * _DURATION_UNIT[unit] for n, unit in parts)
+
+    from datetime import datetime, timezone  # noqa: PLC0415
+
+    try:
+        reset_at = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return (reset_at - datetime.now(timezone.utc)).total_seconds()
+
+
+class RateLimitPacer:
+    """
+    Thread-safe request pacing driven by the provider's rate-limit headers.
+
+    Requests go out immediately while the reported remaining-request budget
+    is at least `threshold`.  Once it drops below, every worker holds off
+    until the reported reset time (capped at MAX_PACE_SECONDS).  Size
+    `threshold` to the number of requests that may already be in flight.
+    """
+
+    def __init__(self, threshold: int = 1):
+        self.threshold  = threshold
+        self._lock      = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        """Block until the current rate-limit window allows another request."""
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def observe(self, remaining: str | None, reset: str | None) -> None:
+        """Record the remaining/reset header values from one response."""
+        if remaining is None or reset is None:
+            return
+        try:
+            if int(remaining) >= self.threshold:
+                return
+        except ValueError:
+            return
+        delay = _reset_seconds(reset)
+        if not delay or delay <= 0:
+            return
+        with self._lock:
+            self._resume_at = max(
+                self._resume_at, time.monotonic() + min(delay, MAX_PACE_SECONDS),
+            )
+
 
 def call_api(
     client,
@@ -290,32 +424,37 @@ def call_api(
     invocation: int,
     approach: str,
     dry_run: bool,
+    preview: str | None = None,
+    pacer: RateLimitPacer | None = None,
 ) -> InvocationUsage:
     usage = InvocationUsage(invocation=invocation, approach=approach)
 
     if dry_run:
-        if isinstance(system, str):
-            preview = system[:400].replace("\n", "\n      ")
-        else:
-            preview = json.dumps(system, indent=2)[:400]
         print(f"\n  [DRY RUN] {approach.upper()} — invocation {invocation}")
         print(f"  System prompt ({type(system).__name__}):")
-        print(f"    {preview}")
-        if isinstance(system, str) and len(system) > 400:
-            print(f"    ... ({len(system) - 400} more chars)")
+        print(preview or system_preview(system))
         return usage
 
-    resp = client.messages.create(
+    kwargs = dict(
         model=model,
         max_tokens=32,
         system=system,
-        messages=[{"role": "user", "content": USER_MESSAGE}],
+        messages=ANTHROPIC_MESSAGES,
     )
+    if pacer is None:
+        resp = client.messages.create(**kwargs)
+    else:
+        pacer.wait()
+        raw  = client.messages.with_raw_response.create(**kwargs)
+        pacer.observe(
+            raw.headers.get("anthropic-ratelimit-requests-remaining"),
+            raw.headers.get("anthropic-ratelimit-requests-reset"),
+        )
+        resp = raw.parse()
     u = resp.usage
-    usage.input_tokens                  = getattr(u, "input_tokens", 0) or 0
-    usage.cache_creation_input_tokens   = getattr(u, "cache_creation_input_tokens", 0) or 0
-    usage.cache_read_input_tokens       = getattr(u, "cache_read_input_tokens", 0) or 0
-    usage.output_tokens                 = getattr(u, "output_tokens", 0) or 0
+    raw = u.model_dump() if hasattr(u, "model_dump") else vars(u)
+    for key in ANTHROPIC_USAGE_FIELDS:
+        setattr(usage, key, raw.get(key) or 0)
     return usage
 
 
@@ -326,19 +465,18 @@ def call_api_openai(
     invocation: int,
     approach: str,
     dry_run: bool,
+    preview: str | None = None,
+    pacer: RateLimitPacer | None = None,
 ) -> InvocationUsage:
     usage = InvocationUsage(invocation=invocation, approach=approach)
 
     if dry_run:
-        preview = system[:400].replace("\n", "\n      ")
         print(f"\n  [DRY RUN] {approach.upper()} — invocation {invocation}")
         print(f"  System prompt (OpenAI flat string, {len(system)} chars):")
-        print(f"    {preview}")
-        if len(system) > 400:
-            print(f"    ... ({len(system) - 400} more chars)")
+        print(preview or system_preview(system))
         return usage
 
-    resp = client.chat.completions.create(
+    kwargs = dict(
         model=model,
         max_tokens=32,
         messages=[
@@ -346,6 +484,16 @@ def call_api_openai(
             {"role": "user",   "content": USER_MESSAGE},
         ],
     )
+    if pacer is None:
+        resp = client.chat.completions.create(**kwargs)
+    else:
+        pacer.wait()
+        raw  = client.chat.completions.with_raw_response.create(**kwargs)
+        pacer.observe(
+            raw.headers.get("x-ratelimit-remaining-requests"),
+            raw.headers.get("x-ratelimit-reset-requests"),
+        )
+        resp = raw.parse()
     u = resp.usage
     details = getattr(u, "prompt_tokens_details", None)
     cached  = getattr(details, "cached_tokens", 0) or 0
@@ -367,6 +515,7 @@ def call_api_gemini(
     invocation: int,
     approach: str,
     dry_run: bool,
+    preview: str | None = None,
 ) -> "InvocationUsage":
     """
     Gemini API call via google-genai SDK.
@@ -380,12 +529,9 @@ def call_api_gemini(
     usage = InvocationUsage(invocation=invocation, approach=approach)
 
     if dry_run:
-        preview = system[:400].replace("\n", "\n      ")
         print(f"\n  [DRY RUN] {approach.upper()} — invocation {invocation}")
         print(f"  System prompt (Gemini flat string, {len(system)} chars):")
-        print(f"    {preview}")
-        if len(system) > 400:
-            print(f"    ... ({len(system) - 400} more chars)")
+        print(preview or system_preview(system))
         return usage
 
     from google import genai as google_genai  # noqa: PLC0415
@@ -407,17 +553,206 @@ def call_api_gemini(
     return usage
 
 
+async def run_invocations(
+    call_fn,
+    client,
+    model: str,
+    naive_system,
+    ics_system,
+    n: int,
+    dry_run: bool,
+    naive_calls: int | None = None,
+    concurrency: int = 8,
+    report=None,
+) -> tuple[list[InvocationUsage], list[InvocationUsage]]:
+    """
+    Issue the naive and ICS requests for invocations 1..n concurrently.
+
+    Only the first `naive_calls` naive requests (default: all n) are sent;
+    the naive usage for later invocations is copied from the last measured
+    one.  This is only sound when the naive request cannot hit a cache.
+
+    The SDK clients are blocking, so each request runs in a worker thread
+    and wall time is bounded by the slowest round-trip rather than the sum.
+    Invocation 1 completes before the rest are dispatched: its ICS call
+    writes the prompt cache that invocations 2..n are expected to read.
+    At most `concurrency` requests are in flight at once, so large n doesn't
+    burst past the provider's rate limit; call functions wrapped with a
+    RateLimitPacer also back off when the reported budget runs low, and
+    429 retries are left to the SDKs' built-in backoff.
+
+    `report(naive, ics)` is called with each invocation's usage pair as soon
+    as both are in, so progress shows while later requests are still running.
+
+    Dry runs stay sequential and print each invocation's progress line
+    around its request previews; each preview is rendered once and reused
+    for every invocation.
+    """
+    naive_calls = n if naive_calls is None else naive_calls
+
+    if dry_run:
+        previews = {
+            "naive": system_preview(naive_system),
+            "ics":   system_preview(ics_system),
+        }
+        naive, ics = [], []
+        for i in range(1, n + 1):
+            sys.stdout.write(_PROGRESS_START(i, n))
+            if i <= naive_calls:
+                naive.append(call_fn(client, model, naive_system, i, "naive",
+                                     dry_run, previews["naive"]))
+            ics.append(call_fn(client, model, ics_system, i, "ics",
+                               dry_run, previews["ics"]))
+            print("(dry run)")
+        naive += [replace(naive[-1], invocation=i) for i in range(len(naive) + 1, n + 1)]
+        return naive, ics
+
+    import asyncio
+
+    slots = asyncio.Semaphore(concurrency)
+    measured = {}  # invocation -> task for its naive request
+
+    async def send(i, approach, system):
+        async with slots:
+            return await asyncio.to_thread(
+                call_fn, client, model, system, i, approach, dry_run,
+            )
+
+    async def invocation(i):
+        if i <= naive_calls:
+            measured[i] = asyncio.ensure_future(send(i, "naive", naive_system))
+            u_ics = await send(i, "ics", ics_system)
+            u_naive = await measured[i]
+        else:
+            u_ics = await send(i, "ics", ics_system)
+            u_naive = replace(await measured[naive_calls], invocation=i)
+        if report is not None:
+            report(u_naive, u_ics)
+        return u_naive, u_ics
+
+    async def dispatch(invocations):
+        return await asyncio.gather(*(invocation(i) for i in invocations))
+
+    pairs  = await dispatch([1])
+    pairs += await dispatch(range(2, n + 1))
+    return [u for u, _ in pairs], [v for _, v in pairs]
+
+
+def with_result_cache(call_fn, provider: str, cache_dir: str, ttl: float):
+    """
+    Wrap a call_api* function so repeat runs reuse recent usage results.
+
+    Results are stored as JSON under `cache_dir`, keyed by a SHA-256 of
+    (provider, model, approach, invocation, system, USER_MESSAGE), and reused
+    while younger than `ttl` seconds.  Approach and invocation are part of
+    the key because the naive and ICS prompts are identical text for
+    providers without cache markup, and each invocation is its own
+    measurement.  Invocation 1 always goes to the API: it is the call that
+    writes the provider's prompt cache, which a stored result can't stand in
+    for.  Dry runs are never cached.
+    """
+    import hashlib  # noqa: PLC0415
+
+    def cached_call(client, model, system, invocation, approach, dry_run, preview=None):
+        if dry_run or invocation == 1:
+            return call_fn(client, model, system, invocation, approach, dry_run, preview)
+
+        key  = json.dumps(
+            [provider, model, approach, invocation, system, USER_MESSAGE], sort_keys=True,
+        )
+        path = os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".json")
+        try:
+            if time.time() - os.path.getmtime(path) < ttl:
+                with open(path, encoding="utf-8") as f:
+                    counts = json.load(f)
+                return InvocationUsage(invocation=invocation, approach=approach, **counts)
+        except (OSError, ValueError, TypeError):
+            pass  # missing, stale or unreadable entry — fall through to the API
+
+        usage = call_fn(client, model, system, invocation, approach, dry_run, preview)
+        counts = {k: getattr(usage, k) for k in ANTHROPIC_USAGE_FIELDS}
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(counts, f)
+        os.replace(tmp, path)
+        return usage
+
+    return cached_call
+
+
 # ---------------------------------------------------------------------------
 # Report helpers
 # ---------------------------------------------------------------------------
 
-W = 76
+def write_json(obj, file=None) -> None:
+    """
+    Write indented JSON for --json output to `file` (default stdout).
+
+    Encoded by orjson when it is installed; the stdlib fallback streams the
+    encoder's chunks to `file` rather than building the whole document first.
+    """
+    file = file or sys.stdout
+    try:
+        import orjson
+    except ImportError:
+        json.dump(obj, file, indent=2, ensure_ascii=False)
+    else:
+        file.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode())
+    file.write("\n")
+
+
+W   = 76
+SEP = "-" * W
+EQ  = "=" * W
+
+# Per-invocation table rows: Inv, Approach, Input, [CacheWrite,] Cached/CacheRead, Output
+_ROW_ANTHROPIC = "  {:<4}  {:<8}  {:>8,}  {:>18,}  {:>17,}  {:>7,}".format
+_ROW_CACHED    = "  {:<4}  {:<8}  {:>8,}  {:>13,}  {:>7,}".format
+
+# Per-invocation progress lines, written as each invocation completes
+_PROGRESS_START     = "  Invocation {}/{}... ".format
+_PROGRESS_CACHED    = ("  Invocation {}/{}... naive: {:,} input +{:,} cached  |  "
+                       "ics: {:,} input +{:,} cached\n").format
+_PROGRESS_ANTHROPIC = ("  Invocation {}/{}... naive: {:,} input  |  "
+                       "ics: {:,} input  +{:,} cache_write  +{:,} cache_read\n").format
+
+_usage_counts = attrgetter(*ANTHROPIC_USAGE_FIELDS)
 
-def _bar(n: int, total: int, width: int = 20) -> str:
-    if total == 0:
-        return " " * width
-    filled = round(n / total * width)
-    return "█" * filled + "░" * (width - filled)
+# Per-provider display labels
+_CACHED_COL = {
+    "openai": "Cached(0.5×)",
+    "gemini": "Cached(0.25×)",
+    "ollama": "Cached(—)",
+}
+_CACHE_RATE  = {"openai": "0.50×", "gemini": "0.25×"}
+_PRICING_URL = {
+    "anthropic": "https://www.anthropic.com/pricing",
+    "openai":    "https://openai.com/pricing",
+    "gemini":    "https://ai.google.dev/pricing",
+}
+
+
+def _usage_totals(
+    usages: list[InvocationUsage],
+    model: str,
+    provider: str,
+) -> tuple[int, int, int, float]:
+    """
+    Sum (input, cache_write, cache_read) tokens and USD cost over `usages`
+    in one pass.  Cost is linear in the counts, so it is priced once from
+    the totals rather than per invocation.
+    """
+    t_input = t_write = t_read = t_output = 0
+    for u in usages:
+        input_tokens, write, read, output = _usage_counts(u)
+        t_input  += input_tokens
+        t_write  += write
+        t_read   += read
+        t_output += output
+
+    cost = make_cost_fn(model, provider)(t_input, t_write, t_read, t_output)
+    return t_input, t_write, t_read, cost
 
 
 def print_summary(
@@ -427,99 +762,83 @@ def print_summary(
     provider: str,
     cache_warning: bool,
     perm_tokens: int,
+    naive_calls: int | None = None,
 ):
-    sep = "-" * W
-    eq  = "=" * W
+    # The summary tables and verdict are buffered and written in one call.
+    out  = io.StringIO()
+    emit = partial(print, file=out)
+
     is_anthropic = provider == "anthropic"
     is_ollama    = provider == "ollama"
 
-    # Per-provider display labels
-    _cached_col = {
-        "openai": "Cached(0.5×)",
-        "gemini": "Cached(0.25×)",
-        "ollama": "Cached(—)",
-    }
-    _cache_rate = {"openai": "0.50×", "gemini": "0.25×"}
-    _pricing_url = {
-        "anthropic": "https://www.anthropic.com/pricing",
-        "openai":    "https://openai.com/pricing",
-        "gemini":    "https://ai.google.dev/pricing",
-    }
-    cached_col  = _cached_col.get(provider, "Cached")
-    cache_rate  = _cache_rate.get(provider, "n/a")
-    pricing_url = _pricing_url.get(provider, "")
+    cached_col  = _CACHED_COL.get(provider, "Cached")
+    cache_rate  = _CACHE_RATE.get(provider, "n/a")
+    pricing_url = _PRICING_URL.get(provider, "")
 
     # ── Per-invocation table ──────────────────────────────────────────────
-    print(f"\n{eq}")
-    print(f"  Per-invocation token usage  [{provider}]")
-    print(eq)
+    emit(f"\n{EQ}")
+    emit(f"  Per-invocation token usage  [{provider}]")
+    emit(EQ)
 
     if is_anthropic:
-        print(f"  {'Inv':<4}  {'Approach':<8}  {'Input':>8}  "
-              f"{'CacheWrite(1.25×)':>18}  {'CacheRead(0.10×)':>17}  {'Output':>7}")
+        emit(f"  {'Inv':<4}  {'Approach':<8}  {'Input':>8}  "
+             f"{'CacheWrite(1.25×)':>18}  {'CacheRead(0.10×)':>17}  {'Output':>7}")
     else:
-        print(f"  {'Inv':<4}  {'Approach':<8}  {'Input':>8}  {cached_col:>13}  {'Output':>7}")
-    print(sep)
+        emit(f"  {'Inv':<4}  {'Approach':<8}  {'Input':>8}  {cached_col:>13}  {'Output':>7}")
+    emit(SEP)
 
-    for u in naive:
-        if is_anthropic:
-            print(f"  {u.invocation:<4}  {'naive':<8}  {u.input_tokens:>8,}  "
-                  f"{u.cache_creation_input_tokens:>18,}  "
-                  f"{u.cache_read_input_tokens:>17,}  {u.output_tokens:>7,}")
-        else:
-            print(f"  {u.invocation:<4}  {'naive':<8}  {u.input_tokens:>8,}  "
-                  f"{u.cache_read_input_tokens:>13,}  {u.output_tokens:>7,}")
-
-    print()
-
-    for u in ics:
-        if is_anthropic:
-            print(f"  {u.invocation:<4}  {'ics':<8}  {u.input_tokens:>8,}  "
-                  f"{u.cache_creation_input_tokens:>18,}  "
-                  f"{u.cache_read_input_tokens:>17,}  {u.output_tokens:>7,}")
-        else:
-            print(f"  {u.invocation:<4}  {'ics':<8}  {u.input_tokens:>8,}  "
-                  f"{u.cache_read_input_tokens:>13,}  {u.output_tokens:>7,}")
+    if is_anthropic:
+        rows = [
+            _ROW_ANTHROPIC(u.invocation, u.approach, u.input_tokens,
+                           u.cache_creation_input_tokens,
+                           u.cache_read_input_tokens, u.output_tokens)
+            for u in (*naive, *ics)
+        ]
+    else:
+        rows = [
+            _ROW_CACHED(u.invocation, u.approach, u.input_tokens,
+                        u.cache_read_input_tokens, u.output_tokens)
+            for u in (*naive, *ics)
+        ]
+    rows.insert(len(naive), "")
+    emit("\n".join(rows))
 
     # ── Summary ───────────────────────────────────────────────────────────
-    n_input  = sum(u.input_tokens for u in naive)
-    n_cached = sum(u.cache_read_input_tokens for u in naive)
-    i_input  = sum(u.input_tokens for u in ics)
-    i_write  = sum(u.cache_creation_input_tokens for u in ics)
-    i_read   = sum(u.cache_read_input_tokens for u in ics)
-
-    n_cost = sum(u.cost(model, provider) for u in naive)
-    i_cost = sum(u.cost(model, provider) for u in ics)
-
-    print(f"\n{eq}")
-    print(f"  Summary — {len(naive)} invocation(s)")
-    print(eq)
-    print(f"  {'Metric':<42}  {'Naive':>10}  {'ICS':>10}")
-    print(sep)
-    print(f"  {'Full-rate input tokens':<42}  {n_input:>10,}  {i_input:>10,}")
+    n_input, _,       n_cached, n_cost = _usage_totals(naive, model, provider)
+    i_input, i_write, i_read,   i_cost = _usage_totals(ics,   model, provider)
+
+    emit(f"\n{EQ}")
+    emit(f"  Summary — {len(naive)} invocation(s)")
+    emit(EQ)
+    emit(f"  {'Metric':<42}  {'Naive':>10}  {'ICS':>10}")
+    emit(SEP)
+    emit(f"  {'Full-rate input tokens':<42}  {n_input:>10,}  {i_input:>10,}")
 
     if is_anthropic:
-        print(f"  {'Cache-write tokens (billed at 1.25×)':<42}  {'—':>10}  {i_write:>10,}")
-        print(f"  {'Cache-read tokens (billed at 0.10×)':<42}  {'—':>10}  {i_read:>10,}")
+        emit(f"  {'Cache-write tokens (billed at 1.25×)':<42}  {'—':>10}  {i_write:>10,}")
+        emit(f"  {'Cache-read tokens (billed at 0.10×)':<42}  {'—':>10}  {i_read:>10,}")
     elif not is_ollama:
         cache_label = f"Cached tokens (billed at {cache_rate})"
-        print(f"  {cache_label:<42}  {n_cached:>10,}  {i_read:>10,}")
+        emit(f"  {cache_label:<42}  {n_cached:>10,}  {i_read:>10,}")
 
-    print(sep)
+    emit(SEP)
     if is_ollama:
-        print(f"  {'Token counts (local — no API cost)':<52}")
+        emit(f"  {'Token counts (local — no API cost)':<52}")
     else:
-        print(f"  {'Estimated cost (USD)*':<42}  ${n_cost:>9.5f}  ${i_cost:>9.5f}")
+        emit(f"  {'Estimated cost (USD)*':<42}  ${n_cost:>9.5f}  ${i_cost:>9.5f}")
 
     if n_cost > 0 and not is_ollama:
         savings_pct = (n_cost - i_cost) / n_cost * 100
         savings_usd = n_cost - i_cost
-        print(f"  {'Cost saved':<42}  {'':>10}  "
-              f"${savings_usd:>8.5f}  ({savings_pct:.1f}%)")
+        emit(f"  {'Cost saved':<42}  {'':>10}  "
+             f"${savings_usd:>8.5f}  ({savings_pct:.1f}%)")
 
+    if naive_calls is not None and naive_calls < len(naive):
+        emit(f"\n  Naive rows after invocation {naive_calls} are copies of the "
+             f"last measured call (--naive-calls).")
     if not is_ollama:
-        print(f"\n  * Pricing approximate; verify at {pricing_url}")
-    print(f"    Model: {model}  Provider: {provider}")
+        emit(f"\n  * Pricing approximate; verify at {pricing_url}")
+    emit(f"    Model: {model}  Provider: {provider}")
 
     total_cached = i_read
     if is_ollama:
@@ -527,27 +846,28 @@ def print_summary(
         i_total = i_input
         if n_total > 0:
             struct_pct = (n_total - i_total) / n_total * 100
-            print(f"\n  ✓  ICS structural reduction: {i_total:,} vs {n_total:,} tokens "
-                  f"({struct_pct:.1f}% smaller prompts).")
-            print(f"     (Ollama is local — no caching, but ICS reduces prompt size.)")
+            emit(f"\n  ✓  ICS structural reduction: {i_total:,} vs {n_total:,} tokens "
+                 f"({struct_pct:.1f}% smaller prompts).")
+            emit(f"     (Ollama is local — no caching, but ICS reduces prompt size.)")
     elif cache_warning:
-        print(f"\n  ⚠  Prompt cache was NOT activated.")
-        print(f"     Permanent layers = ~{perm_tokens} tokens "
-              f"(need ≥ {CACHE_MIN_TOKENS} for caching).")
+        emit(f"\n  ⚠  Prompt cache was NOT activated.")
+        emit(f"     Permanent layers = ~{perm_tokens} tokens "
+             f"(need ≥ {CACHE_MIN_TOKENS} for caching).")
         if is_anthropic:
-            print(f"     cache_creation_input_tokens and cache_read_input_tokens")
-            print(f"     will both be 0. Use a larger instruction file.")
+            emit(f"     cache_creation_input_tokens and cache_read_input_tokens")
+            emit(f"     will both be 0. Use a larger instruction file.")
         else:
-            print(f"     cached_tokens will be 0. Use a larger instruction file.")
+            emit(f"     cached_tokens will be 0. Use a larger instruction file.")
     else:
         if total_cached > 0:
-            print(f"\n  ✓  Prompt cache activated — "
-                  f"{total_cached:,} tokens served from cache at {cache_rate} rate.")
+            emit(f"\n  ✓  Prompt cache activated — "
+                 f"{total_cached:,} tokens served from cache at {cache_rate} rate.")
         else:
-            print(f"\n  ℹ  No cached tokens yet. The cache may need one warm-up")
-            print(f"     call before serving reads; try more invocations.")
+            emit(f"\n  ℹ  No cached tokens yet. The cache may need one warm-up")
+            emit(f"     call before serving reads; try more invocations.")
 
-    print()
+    emit()
+    sys.stdout.write(out.getvalue())
 
 
 # ---------------------------------------------------------------------------
@@ -555,11 +875,15 @@ def print_summary(
 # ---------------------------------------------------------------------------
 
 def run(args):
+    # Deferred so that --help and argument errors don't pay for them.
+    import asyncio
+    from ics_token_analyzer import EXAMPLE_REFACTORING, count_tokens_word_boundary
+
     # ── Load instruction ──────────────────────────────────────────────────
     if args.file:
         try:
-            with open(args.file) as f:
-                text = f.read()
+            with open(args.file, "rb") as f:
+                text = f.read().decode("utf-8")
         except FileNotFoundError:
             print(f"Error: file not found: {args.file}", file=sys.stderr)
             sys.exit(1)
@@ -577,24 +901,22 @@ def run(args):
         sys.exit(1)
 
     layer_map = {l.name: l for l in layers}
+    rendered  = render_groups(layer_map)
 
     # ── Check cache threshold ─────────────────────────────────────────────
-    perm_text = "\n\n".join(
-        _layer_block(name, layer_map[name].content)
-        for name in LAYER_ORDER
-        if name in layer_map and name in PERMANENT
-    )
-    perm_tokens   = count_tokens_word_boundary(perm_text)
+    perm_text = rendered[0]
+    # Only the below/above-threshold bit matters, so stop counting there.
+    perm_tokens   = count_tokens_word_boundary(perm_text, limit=CACHE_MIN_TOKENS)
     cache_warning = perm_tokens < CACHE_MIN_TOKENS
 
     provider = getattr(args, "provider", "anthropic")
 
     # ── Build system prompts ──────────────────────────────────────────────
-    naive_system = build_naive_system(layer_map)
+    naive_system = build_naive_system(layer_map, rendered)
     if provider == "anthropic":
-        ics_system = build_ics_system(layer_map)        # content blocks with cache_control
+        ics_system = build_ics_system(layer_map, rendered)       # content blocks with cache_control
     else:
-        ics_system = build_ics_system_flat(layer_map)   # flat string, stable prefix first
+        ics_system = build_ics_system_flat(layer_map, rendered)  # flat string, stable prefix first
 
     # ── Set up API client ─────────────────────────────────────────────────
     if not args.dry_run:
@@ -652,6 +974,27 @@ def run(args):
     model = args.model
     n     = args.invocations
 
+    # CACHE_MIN_TOKENS is Anthropic's limit; other providers cache shorter
+    # prefixes (OpenAI from 1024 tokens), so only Anthropic runs are cut back.
+    uncacheable = cache_warning and provider == "anthropic"
+
+    # Below the threshold the cache cannot activate, so invocations after the
+    # first would only repeat the same numbers at full price.
+    reduced = uncacheable and n > 1 and not args.dry_run and not args.force
+    if reduced:
+        n = 1
+
+    # Warming a cache that cannot activate would only spend tokens.
+    warmups = 0 if args.dry_run or uncacheable else args.warmup
+
+    # An Anthropic naive request carries no cache markup, so every naive call
+    # returns the same usage and one measurement is enough.  Other providers
+    # cache prefixes automatically, which makes later naive calls cheaper.
+    naive_calls = args.naive_calls
+    if naive_calls is None:
+        naive_calls = 1 if provider == "anthropic" else n
+    naive_calls = min(naive_calls, n)
+
     # Default model per provider if user didn't override
     if model == "claude-haiku-4-5-20251001":
         if provider == "openai":
@@ -662,73 +1005,75 @@ def run(args):
             model = "llama3.2"
 
     # ── Print header ──────────────────────────────────────────────────────
-    print(f"\n{'=' * W}")
-    print(f"  ICS Live Tester")
-    print(f"{'=' * W}")
-    print(f"  Instruction:     {label}")
-    print(f"  Provider:        {provider}")
-    print(f"  Model:           {model}")
-    print(f"  Invocations:     {n}")
-    print(f"  Perm. layers:    ~{perm_tokens} tokens (word-boundary estimate)")
-    print(f"  Cache threshold: {CACHE_MIN_TOKENS} tokens")
-    print(f"  Dry run:         {'yes' if args.dry_run else 'no'}")
+    out  = io.StringIO()
+    emit = partial(print, file=out)
+    emit(f"\n{EQ}")
+    emit(f"  ICS Live Tester")
+    emit(EQ)
+    emit(f"  Instruction:     {label}")
+    emit(f"  Provider:        {provider}")
+    emit(f"  Model:           {model}")
+    emit(f"  Invocations:     {n}")
+    if naive_calls < n:
+        emit(f"  Naive calls:     {naive_calls} (later naive rows copy the last measured call)")
+    perm_label = f"~{perm_tokens}" if cache_warning else f"≥ {CACHE_MIN_TOKENS}"
+    emit(f"  Perm. layers:    {perm_label} tokens (word-boundary estimate)")
+    emit(f"  Cache threshold: {CACHE_MIN_TOKENS} tokens")
+    emit(f"  Dry run:         {'yes' if args.dry_run else 'no'}")
+    if warmups:
+        emit(f"  Warm-up:         {warmups} unreported ICS call(s) — rows show steady-state cost")
     if provider == "openai":
-        print(f"\n  Cache model: OpenAI automatic prefix caching (no explicit markup).")
-        print(f"  ICS benefit: permanent layers grouped first → largest stable prefix.")
+        emit(f"\n  Cache model: OpenAI automatic prefix caching (no explicit markup).")
+        emit(f"  ICS benefit: permanent layers grouped first → largest stable prefix.")
     elif provider == "gemini":
-        print(f"\n  Cache model: Gemini implicit context caching (≥ 32K tokens typical).")
-        print(f"  ICS benefit: permanent layers grouped first → largest stable prefix.")
+        emit(f"\n  Cache model: Gemini implicit context caching (≥ 32K tokens typical).")
+        emit(f"  ICS benefit: permanent layers grouped first → largest stable prefix.")
     elif provider == "ollama":
-        print(f"\n  Cache model: Ollama (local) — no prompt caching available.")
-        print(f"  ICS benefit: structural reduction decreases prompt token count.")
+        emit(f"\n  Cache model: Ollama (local) — no prompt caching available.")
+        emit(f"  ICS benefit: structural reduction decreases prompt token count.")
     if cache_warning:
-        print(f"\n  ⚠  Permanent layers are below the cache threshold.")
-        print(f"     No cache hits expected. Use a larger instruction file.")
-    print(f"{'=' * W}\n")
+        emit(f"\n  ⚠  Permanent layers are below the cache threshold.")
+        emit(f"     No cache hits expected. Use a larger instruction file.")
+    if reduced:
+        emit(f"     Reducing to 1 invocation — cache cannot activate below the")
+        emit(f"     threshold. Use --force to run all {args.invocations}.")
+    emit(f"{EQ}\n")
+    sys.stdout.write(out.getvalue())
 
     # ── Run invocations ───────────────────────────────────────────────────
-    naive_usages: list[InvocationUsage] = []
-    ics_usages:   list[InvocationUsage] = []
+    # Anthropic and OpenAI report request budgets in response headers; pace
+    # on those so workers only back off when the budget is nearly spent.
+    pacer = RateLimitPacer(threshold=args.concurrency)
+    if provider in ("openai", "ollama"):
+        call_fn = partial(call_api_openai, pacer=pacer)
+    elif provider == "gemini":
+        call_fn = call_api_gemini
+    else:
+        call_fn = partial(call_api, pacer=pacer)
 
-    for i in range(1, n + 1):
-        print(f"  Invocation {i}/{n}...", end=" ", flush=True)
+    # Unreported ICS calls that write the prompt cache before measurement, so
+    # every measured row reflects the steady-state cache-read cost.
+    for _ in range(warmups):
+        call_fn(client, model, ics_system, 0, "ics", args.dry_run)
 
-        if provider == "openai":
-            u_naive = call_api_openai(client, model, naive_system, i, "naive", args.dry_run)
-            u_ics   = call_api_openai(client, model, ics_system,   i, "ics",   args.dry_run)
-        elif provider == "gemini":
-            u_naive = call_api_gemini(client, model, naive_system, i, "naive", args.dry_run)
-            u_ics   = call_api_gemini(client, model, ics_system,   i, "ics",   args.dry_run)
-        elif provider == "ollama":
-            u_naive = call_api_openai(client, model, naive_system, i, "naive", args.dry_run)
-            u_ics   = call_api_openai(client, model, ics_system,   i, "ics",   args.dry_run)
-        else:
-            u_naive = call_api(client, model, naive_system, i, "naive", args.dry_run)
-            u_ics   = call_api(client, model, ics_system,   i, "ics",   args.dry_run)
-
-        naive_usages.append(u_naive)
-        ics_usages.append(u_ics)
-
-        if not args.dry_run:
-            if provider in ("openai", "gemini", "ollama"):
-                print(
-                    f"naive: {u_naive.input_tokens:,} input "
-                    f"+{u_naive.cache_read_input_tokens:,} cached  |  "
-                    f"ics: {u_ics.input_tokens:,} input "
-                    f"+{u_ics.cache_read_input_tokens:,} cached"
-                )
-            else:
-                print(
-                    f"naive: {u_naive.input_tokens:,} input  |  "
-                    f"ics: {u_ics.input_tokens:,} input  "
-                    f"+{u_ics.cache_creation_input_tokens:,} cache_write  "
-                    f"+{u_ics.cache_read_input_tokens:,} cache_read"
-                )
+    if args.reuse_results:
+        call_fn = with_result_cache(call_fn, provider, args.cache_dir, args.cache_ttl)
+
+    # One progress line per invocation, written as soon as its pair is in.
+    def report(u, v):
+        if provider in ("openai", "gemini", "ollama"):
+            line = _PROGRESS_CACHED(u.invocation, n, u.input_tokens, u.cache_read_input_tokens,
+                                    v.input_tokens, v.cache_read_input_tokens)
         else:
-            print("(dry run)")
+            line = _PROGRESS_ANTHROPIC(u.invocation, n, u.input_tokens, v.input_tokens,
+                                       v.cache_creation_input_tokens, v.cache_read_input_tokens)
+        sys.stdout.write(line)
+        sys.stdout.flush()
 
-        if i < n and not args.dry_run:
-            time.sleep(0.5)
+    naive_usages, ics_usages = asyncio.run(run_invocations(
+        call_fn, client, model, naive_system, ics_system, n, args.dry_run,
+        naive_calls, args.concurrency, report,
+    ))
 
     # ── Output ────────────────────────────────────────────────────────────
     if args.dry_run:
@@ -736,23 +1081,20 @@ def run(args):
         return
 
     if args.json_output:
-        pricing_table = {
-            "openai": OPENAI_PRICING,
-            "gemini": GEMINI_PRICING,
-            "ollama": OLLAMA_PRICING,
-        }.get(provider, ANTHROPIC_PRICING)
         payload = {
             "provider": provider,
             "model":    model,
             "label":    label,
-            "naive":    [vars(u) for u in naive_usages],
-            "ics":      [vars(u) for u in ics_usages],
-            "pricing":  pricing_table.get(model, pricing_table["default"]),
+            "naive_calls": naive_calls,
+            "naive":    [asdict(u) for u in naive_usages],
+            "ics":      [asdict(u) for u in ics_usages],
+            "pricing":  pricing_for(model, provider),
         }
-        print(json.dumps(payload, indent=2))
+        write_json(payload)
         return
 
-    print_summary(naive_usages, ics_usages, model, provider, cache_warning, perm_tokens)
+    print_summary(naive_usages, ics_usages, model, provider, cache_warning, perm_tokens,
+                  naive_calls)
 
 
 def main():
@@ -778,6 +1120,12 @@ def main():
         "--invocations", "-n", type=int, default=3, metavar="N",
         help="Number of invocations to simulate per approach (default: 3)",
     )
+    parser.add_argument(
+        "--naive-calls", type=int, default=None, metavar="K",
+        help="Measure only the first K naive requests and replicate the last "
+             "for the remaining invocations (default: 1 for anthropic, whose "
+             "naive request is uncached; N for other providers)",
+    )
     parser.add_argument(
         "--model", default="claude-haiku-4-5-20251001",
         help=(
@@ -794,12 +1142,46 @@ def main():
         "--dry-run", action="store_true",
         help="Print the requests that would be sent without calling the API",
     )
+    parser.add_argument(
+        "--warmup", type=int, default=0, metavar="K",
+        help="Send K unreported ICS calls first so every measured invocation "
+             "reads a warm cache (default: 0 — invocation 1 pays the cache write)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, metavar="K",
+        help="Maximum number of API requests in flight at once (default: 8)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Run all N invocations even when the permanent layers are below "
+             "Anthropic's cache threshold (by default only one is run)",
+    )
+    parser.add_argument(
+        "--reuse-results", action="store_true",
+        help="Reuse usage results from a previous run within --cache-ttl "
+             "instead of calling the API again (invocation 1 is always live)",
+    )
+    parser.add_argument(
+        "--cache-dir", default=".ics_live_cache", metavar="DIR",
+        help="Directory for --reuse-results entries (default: .ics_live_cache)",
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=300, metavar="SECONDS",
+        help="Maximum age of a reusable result; matches the 5-minute "
+             "ephemeral prompt-cache TTL (default: 300)",
+    )
     parser.add_argument(
         "--json", action="store_true", dest="json_output",
         help="Output raw usage data as JSON instead of formatted report",
     )
 
     args = parser.parse_args()
+    if args.naive_calls is not None and args.naive_calls < 1:
+        parser.error("--naive-calls must be at least 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.warmup < 0:
+        parser.error("--warmup cannot be negative")
     run(args)
 
 
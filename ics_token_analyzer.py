@@ -25,15 +25,18 @@ are required. Pass --exact to use tiktoken if installed.
 
 Usage:
     python ics_token_analyzer.py <instruction_file> [--invocations N]
+    python ics_token_analyzer.py --batch <dir> [--invocations N] [--json]
     python ics_token_analyzer.py --test
     python ics_token_analyzer.py --help
 """
 
+import io
+import os
 import re
 import sys
 import json
-import math
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from typing import Optional
 
 # Import layer parser from the reference validator
@@ -59,29 +62,115 @@ _TOKEN_SPLIT = re.compile(
 )
 
 
+# ASCII fast path for the same split: classify each byte as alphabetic (a),
+# digit (d), punctuation (p), whitespace (s) or underscore (_), which \w
+# covers but no branch above matches.  Every token is a maximal run of one
+# class other than "_", so the count is the number of such runs: one for a
+# leading non-"_" byte plus one per adjacent pair of differing classes
+# ending in a token class.  A pair "xy" with x != y cannot overlap itself,
+# so bytes.count over the class stream counts each boundary exactly once.
+def _ascii_class(c: str) -> str:
+    if c.isalpha():
+        return "a"
+    if c.isdigit():
+        return "d"
+    if c.isspace():
+        return "s"
+    return "_" if c == "_" else "p"
+
+
+_ASCII_CLASS = "".join(_ascii_class(chr(c)) for c in range(128)).encode().ljust(256, b"p")
+_CLASS_BOUNDARIES = tuple(
+    bytes((x, y)) for x in b"adps_" for y in b"adps" if x != y
+)
+
+
+def _count_tokens_ascii(text: str) -> int:
+    """Word-boundary token count for ASCII text, without the regex engine."""
+    classes = text.encode("ascii").translate(_ASCII_CLASS)
+    count = sum(map(classes.count, _CLASS_BOUNDARIES))
+    if classes[:1] not in (b"", b"_"):
+        count += 1
+    return count
+
+
 def count_tokens_approx(text: str) -> int:
     """Approximate token count: len(text) / 4, rounded up."""
-    return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
 
 
-def count_tokens_word_boundary(text: str) -> int:
+def count_tokens_word_boundary(text: str, limit: Optional[int] = None) -> int:
     """
     Local word-boundary token count. Splits on word/number/punctuation/whitespace
     boundaries — the same strategy used by offline BPE estimators.
     No network access required. Typically within 5-10% of tiktoken counts
     for English prose.
+
+    If `limit` is given, scanning stops once `limit` tokens have been seen and
+    `limit` is returned — enough for threshold checks on large files.
     """
-    return len(_TOKEN_SPLIT.findall(text))
+    if limit is None:
+        if text.isascii():
+            return _count_tokens_ascii(text)
+        return len(_TOKEN_SPLIT.findall(text))
+    count = 0
+    for count, _ in enumerate(_TOKEN_SPLIT.finditer(text), 1):
+        if count >= limit:
+            break
+    return count
+
+
+# Exact counts memoized by text.  Permanent layers repeat verbatim across
+# instructions and runs, and tiktoken encoding is the expensive step.
+EXACT_CACHE_SIZE = 1024
+_exact_counts: dict[str, int] = {}
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    """The cl100k_base encoder, imported and loaded on first use only."""
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _remember_exact(text: str, count: int) -> None:
+    if len(_exact_counts) >= EXACT_CACHE_SIZE:
+        del _exact_counts[next(iter(_exact_counts))]  # evict the oldest entry
+    _exact_counts[text] = count
 
 
 def count_tokens_exact(text: str) -> int:
     """Exact token count using tiktoken (cl100k_base). Falls back to word-boundary."""
+    count = _exact_counts.get(text)
+    if count is not None:
+        return count
     try:
-        import tiktoken
-        enc = tiktoken.get_encoding("cl100k_base")
-        return len(enc.encode(text))
+        count = len(_tiktoken_encoding().encode(text))
     except Exception:
         return count_tokens_word_boundary(text)
+    _remember_exact(text, count)
+    return count
+
+
+def count_tokens_exact_batch(texts: list[str]) -> list[int]:
+    """
+    Exact token counts for several texts.  Texts not already memoized are
+    encoded in one tiktoken batch call, across threads.  Falls back to
+    count_tokens_exact per text on failure.
+    """
+    counts = {t: _exact_counts[t] for t in texts if t in _exact_counts}
+    pending = [t for t in dict.fromkeys(texts) if t not in counts]
+    if pending:
+        try:
+            encoded = _tiktoken_encoding().encode_batch(
+                pending, num_threads=max(1, min(len(pending), os.cpu_count() or 1)),
+            )
+        except Exception:
+            return [count_tokens_exact(t) for t in texts]
+        for text, tokens in zip(pending, encoded):
+            counts[text] = len(tokens)
+            _remember_exact(text, counts[text])
+    return [counts[t] for t in texts]
 
 
 # ---------------------------------------------------------------------------
@@ -97,6 +186,13 @@ LAYER_LIFETIME = {
     "OUTPUT_CONTRACT":      "invocation",  # changes every call (or stays same)
 }
 
+# (name, lifetime, opening tag, closing tag) per layer in LAYER_ORDER.  Each
+# layer is counted as opening + content + closing.
+_LAYER_META = tuple(
+    (name, LAYER_LIFETIME.get(name, "unknown"), f"###ICS:{name}###\n", f"\n###END:{name}###")
+    for name in LAYER_ORDER
+)
+
 LIFETIME_LABEL = {
     "permanent":  "cacheable (permanent)",
     "session":    "session-scoped",
@@ -108,7 +204,7 @@ LIFETIME_LABEL = {
 # Analysis types
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LayerTokens:
     name: str
     lifetime: str
@@ -116,7 +212,7 @@ class LayerTokens:
     char_count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionSimulation:
     """
     Models a session of `num_invocations` calls.
@@ -128,59 +224,136 @@ class SessionSimulation:
       Default: changes once (sent in full on invocation 1 only).
     - TASK_PAYLOAD and OUTPUT_CONTRACT are unique every invocation.
       Estimated as their token count from the example instruction.
+
+    Per-layer counts and per-lifetime sums are taken once at construction,
+    so the totals below are plain integer arithmetic.
     """
     num_invocations: int
     session_state_changes: int
     layer_tokens: list[LayerTokens]
+    _by_name: dict[str, int] = field(init=False, repr=False, compare=False)
+    _per_call: int = field(init=False, repr=False, compare=False)
+    _permanent: int = field(init=False, repr=False, compare=False)
+    _session: int = field(init=False, repr=False, compare=False)
+    _invocation: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        by_name = {}
+        for lt in self.layer_tokens:
+            by_name.setdefault(lt.name, lt.token_count)
+        sums = dict.fromkeys(LIFETIME_LABEL, 0)
+        for name, count in by_name.items():
+            lifetime = LAYER_LIFETIME.get(name)
+            if lifetime in sums:
+                sums[lifetime] += count
+
+        self._by_name    = by_name
+        self._per_call   = sum(lt.token_count for lt in self.layer_tokens)
+        self._permanent  = sums["permanent"]
+        self._session    = sums["session"]
+        self._invocation = sums["invocation"]
 
     def _tokens_for(self, name: str) -> int:
-        for lt in self.layer_tokens:
-            if lt.name == name:
-                return lt.token_count
-        return 0
+        return self._by_name.get(name, 0)
 
     def naive_total(self) -> int:
         """Naive: resend all layers every invocation."""
-        per_call = sum(lt.token_count for lt in self.layer_tokens)
-        return per_call * self.num_invocations
+        return self._per_call * self.num_invocations
 
     def ics_total(self) -> int:
         """
         ICS: cache permanent layers, resend session layer on changes,
         resend invocation layers every call.
         """
-        permanent = (
-            self._tokens_for("IMMUTABLE_CONTEXT")
-            + self._tokens_for("CAPABILITY_DECLARATION")
-        )
-        session = self._tokens_for("SESSION_STATE")
-        per_invocation = (
-            self._tokens_for("TASK_PAYLOAD")
-            + self._tokens_for("OUTPUT_CONTRACT")
-        )
-
         # Permanent layers sent once (cache prime)
-        total = permanent
+        total = self._permanent
         # Session layer sent on each change
-        total += session * self.session_state_changes
+        total += self._session * self.session_state_changes
         # Invocation layers sent every call
-        total += per_invocation * self.num_invocations
+        total += self._invocation * self.num_invocations
         return total
 
     def tokens_saved(self) -> int:
         return self.naive_total() - self.ics_total()
 
     def savings_pct(self) -> float:
+        return self.compute()["savings_pct"]
+
+    def compute(self) -> dict:
+        """
+        All four session figures from a single evaluation of each total,
+        keyed as in analyze()'s "simulation" block (savings_pct unrounded).
+        """
         naive = self.naive_total()
-        if naive == 0:
-            return 0.0
-        return (self.tokens_saved() / naive) * 100
+        ics = self.ics_total()
+        saved = naive - ics
+        return {
+            "naive_total_tokens": naive,
+            "ics_total_tokens": ics,
+            "tokens_saved": saved,
+            "savings_pct": (saved / naive) * 100 if naive else 0.0,
+        }
 
 
 # ---------------------------------------------------------------------------
 # Report generation
 # ---------------------------------------------------------------------------
 
+_METHOD_LABEL = {
+    "exact":  "exact (tiktoken cl100k_base)",
+    "word":   "word-boundary split (local BPE estimate)",
+    "approx": "approximate (chars/4)",
+}
+
+
+@lru_cache(maxsize=32)
+def _layer_tokens_cached(
+    instruction_text: str,
+    method: str,
+) -> tuple[tuple[LayerTokens, ...], tuple[str, ...]]:
+    """
+    Parse `instruction_text` and count each layer's tokens with `method`.
+
+    Returns (layer_tokens, parse_errors).  Memoized, so repeated analyze()
+    calls on the same text only redo the session arithmetic.
+    """
+    layers, parse_errors = parse_layers(instruction_text)
+    if parse_errors:
+        return (), tuple(parse_errors)
+
+    layer_map = {l.name: l for l in layers}
+    present = []
+    for meta in _LAYER_META:
+        layer = layer_map.get(meta[0])
+        if layer is not None:
+            present.append((meta, layer.content))
+
+    # Count the full layer including boundary tags for realism.  The chars/4
+    # estimate only needs the length, so skip building the text there.
+    if method == "approx":
+        char_counts = [
+            len(opening) + len(content) + len(closing)
+            for (_, _, opening, closing), content in present
+        ]
+        token_counts = [(c + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN for c in char_counts]
+    else:
+        texts = [
+            f"{opening}{content}{closing}"
+            for (_, _, opening, closing), content in present
+        ]
+        char_counts = [len(t) for t in texts]
+        if method == "exact":
+            token_counts = count_tokens_exact_batch(texts)
+        else:
+            token_counts = [count_tokens_word_boundary(t) for t in texts]
+
+    layer_tokens = [
+        LayerTokens(name=name, lifetime=lifetime, token_count=tc, char_count=cc)
+        for ((name, lifetime, _, _), _), tc, cc in zip(present, token_counts, char_counts)
+    ]
+    return tuple(layer_tokens), ()
+
+
 def analyze(
     instruction_text: str,
     num_invocations: int = 10,
@@ -196,45 +369,24 @@ def analyze(
             "word"    — local word-boundary split (no network required)
             "exact"   — tiktoken cl100k_base (requires network on first run)
     """
-    if exact or method == "exact":
-        count_fn = count_tokens_exact
-        method_label = "exact (tiktoken cl100k_base)"
-    elif method == "word":
-        count_fn = count_tokens_word_boundary
-        method_label = "word-boundary split (local BPE estimate)"
-    else:
-        count_fn = count_tokens_approx
-        method_label = "approximate (chars/4)"
+    if exact:
+        method = "exact"
+    elif method not in _METHOD_LABEL:
+        method = "approx"
+    method_label = _METHOD_LABEL[method]
 
-    layers, parse_errors = parse_layers(instruction_text)
+    layer_tokens, parse_errors = _layer_tokens_cached(instruction_text, method)
     if parse_errors:
-        return {"error": "parse_errors", "details": parse_errors}
-
-    layer_map = {l.name: l for l in layers}
-
-    layer_tokens = []
-    for name in LAYER_ORDER:
-        if name not in layer_map:
-            continue
-        layer = layer_map[name]
-        # Count the full layer including boundary tags for realism
-        full_text = (
-            f"###ICS:{name}###\n{layer.content}\n###END:{name}###"
-        )
-        tc = count_fn(full_text)
-        layer_tokens.append(LayerTokens(
-            name=name,
-            lifetime=LAYER_LIFETIME.get(name, "unknown"),
-            token_count=tc,
-            char_count=len(full_text),
-        ))
+        return {"error": "parse_errors", "details": list(parse_errors)}
 
     sim = SessionSimulation(
         num_invocations=num_invocations,
         session_state_changes=session_state_changes,
-        layer_tokens=layer_tokens,
+        layer_tokens=list(layer_tokens),
     )
 
+    totals = sim.compute()
+
     return {
         "method": method_label,
         "layers": [
@@ -250,88 +402,94 @@ def analyze(
         "simulation": {
             "num_invocations": num_invocations,
             "session_state_changes": session_state_changes,
-            "naive_total_tokens": sim.naive_total(),
-            "ics_total_tokens": sim.ics_total(),
-            "tokens_saved": sim.tokens_saved(),
-            "savings_pct": round(sim.savings_pct(), 1),
+            **totals,
+            "savings_pct": round(totals["savings_pct"], 1),
         },
     }
 
 
 def print_report(result: dict, label: str = ""):
-    if "error" in result:
-        print(f"ERROR: {result['error']}")
-        for d in result.get("details", []):
-            print(f"  {d}")
-        return
+    # Buffered; the error branch and the full report each write it once.
+    out  = io.StringIO()
+    emit = partial(print, file=out)
 
     width = 72
     sep = "-" * width
 
     if label:
-        print(f"\n{'=' * width}")
-        print(f"  {label}")
-        print(f"{'=' * width}")
+        emit(f"\n{'=' * width}")
+        emit(f"  {label}")
+        emit(f"{'=' * width}")
 
-    print(f"\nToken counting method: {result['method']}\n")
-    print(sep)
-    print(f"  {'Layer':<30}  {'Lifetime':<26}  {'Tokens':>7}")
-    print(sep)
+    if "error" in result:
+        emit(f"ERROR: {result['error']}")
+        for d in result.get("details", []):
+            emit(f"  {d}")
+        sys.stdout.write(out.getvalue())
+        return
 
-    cacheable_total = 0
-    session_total = 0
-    invocation_total = 0
+    emit(f"\nToken counting method: {result['method']}\n")
+    emit(sep)
+    emit(f"  {'Layer':<30}  {'Lifetime':<26}  {'Tokens':>7}")
+    emit(sep)
+
+    # Token totals per lifetime; layers with any other lifetime aren't bucketed
+    lifetime_totals = dict.fromkeys(LIFETIME_LABEL, 0)
 
     for layer in result["layers"]:
-        lifetime_label = LIFETIME_LABEL.get(layer["lifetime"], layer["lifetime"])
-        print(f"  {layer['name']:<30}  {lifetime_label:<26}  {layer['tokens']:>7,}")
-        if layer["lifetime"] == "permanent":
-            cacheable_total += layer["tokens"]
-        elif layer["lifetime"] == "session":
-            session_total += layer["tokens"]
-        elif layer["lifetime"] == "invocation":
-            invocation_total += layer["tokens"]
-
-    print(sep)
+        lifetime = layer["lifetime"]
+        lifetime_label = LIFETIME_LABEL.get(lifetime, lifetime)
+        emit(f"  {layer['name']:<30}  {lifetime_label:<26}  {layer['tokens']:>7,}")
+        if lifetime in lifetime_totals:
+            lifetime_totals[lifetime] += layer["tokens"]
+
+    cacheable_total  = lifetime_totals["permanent"]
+    session_total    = lifetime_totals["session"]
+    invocation_total = lifetime_totals["invocation"]
+
+    emit(sep)
     total = result["single_invocation_tokens"]
-    print(f"  {'TOTAL (single invocation)':<57}  {total:>7,}")
-    print()
-    print(f"  Cacheable (permanent):   {cacheable_total:>7,} tokens  "
-          f"({cacheable_total/total*100:.1f}% of single invocation)")
-    print(f"  Session-scoped:          {session_total:>7,} tokens  "
-          f"({session_total/total*100:.1f}% of single invocation)")
-    print(f"  Per-invocation:          {invocation_total:>7,} tokens  "
-          f"({invocation_total/total*100:.1f}% of single invocation)")
+    # An instruction with no layers (e.g. an empty file) has nothing to split
+    share = total or 1
+    emit(f"  {'TOTAL (single invocation)':<57}  {total:>7,}")
+    emit()
+    emit(f"  Cacheable (permanent):   {cacheable_total:>7,} tokens  "
+         f"({cacheable_total/share*100:.1f}% of single invocation)")
+    emit(f"  Session-scoped:          {session_total:>7,} tokens  "
+         f"({session_total/share*100:.1f}% of single invocation)")
+    emit(f"  Per-invocation:          {invocation_total:>7,} tokens  "
+         f"({invocation_total/share*100:.1f}% of single invocation)")
 
     sim = result["simulation"]
     n = sim["num_invocations"]
     sc = sim["session_state_changes"]
 
-    print(f"\n{sep}")
-    print(f"  Session simulation: {n} invocations, "
-          f"SESSION_STATE changes {sc} time(s)")
-    print(sep)
-    print(f"  {'Naive (resend all layers every call)':<45}  "
-          f"{sim['naive_total_tokens']:>10,} tokens")
-    print(f"  {'ICS (cache permanent, resend variable)':<45}  "
-          f"{sim['ics_total_tokens']:>10,} tokens")
-    print(sep)
-    print(f"  {'Tokens saved':<45}  {sim['tokens_saved']:>10,} tokens")
-    print(f"  {'Savings':<45}  {sim['savings_pct']:>9.1f}%")
-    print()
+    emit(f"\n{sep}")
+    emit(f"  Session simulation: {n} invocations, "
+         f"SESSION_STATE changes {sc} time(s)")
+    emit(sep)
+    emit(f"  {'Naive (resend all layers every call)':<45}  "
+         f"{sim['naive_total_tokens']:>10,} tokens")
+    emit(f"  {'ICS (cache permanent, resend variable)':<45}  "
+         f"{sim['ics_total_tokens']:>10,} tokens")
+    emit(sep)
+    emit(f"  {'Tokens saved':<45}  {sim['tokens_saved']:>10,} tokens")
+    emit(f"  {'Savings':<45}  {sim['savings_pct']:>9.1f}%")
+    emit()
 
     # Breakdown explanation
-    print(f"  How ICS achieves this:")
-    print(f"    - Cacheable layers sent once:       {cacheable_total:>6,} tokens (1 × {cacheable_total:,})")
-    print(f"    - Session layer sent {sc} time(s):    "
-          f"{session_total * sc:>6,} tokens ({sc} × {session_total:,})")
-    print(f"    - Invocation layers sent {n:2d} times:  "
-          f"{invocation_total * n:>6,} tokens ({n} × {invocation_total:,})")
-    print(f"    - Total ICS cost:                   "
-          f"{sim['ics_total_tokens']:>6,} tokens")
-    print(f"    - vs. naive cost:                   "
-          f"{sim['naive_total_tokens']:>6,} tokens ({n} × {total:,})")
-    print()
+    emit(f"  How ICS achieves this:")
+    emit(f"    - Cacheable layers sent once:       {cacheable_total:>6,} tokens (1 × {cacheable_total:,})")
+    emit(f"    - Session layer sent {sc} time(s):    "
+         f"{session_total * sc:>6,} tokens ({sc} × {session_total:,})")
+    emit(f"    - Invocation layers sent {n:2d} times:  "
+         f"{invocation_total * n:>6,} tokens ({n} × {invocation_total:,})")
+    emit(f"    - Total ICS cost:                   "
+         f"{sim['ics_total_tokens']:>6,} tokens")
+    emit(f"    - vs. naive cost:                   "
+         f"{sim['naive_total_tokens']:>6,} tokens ({n} × {total:,})")
+    emit()
+    sys.stdout.write(out.getvalue())
 
 
 # ---------------------------------------------------------------------------
@@ -571,6 +729,72 @@ def run_tests() -> int:
     return 0 if failed == 0 else 1
 
 
+# ---------------------------------------------------------------------------
+# Batch mode
+# ---------------------------------------------------------------------------
+
+def _warm_tiktoken():
+    """Process-pool initializer: load the tiktoken encoder once per worker."""
+    try:
+        _tiktoken_encoding()
+    except Exception:
+        pass  # count_tokens_exact falls back to word-boundary counts
+
+
+def _analyze_file(
+    path: str,
+    num_invocations: int,
+    session_state_changes: int,
+    exact: bool,
+) -> dict:
+    """
+    --batch worker: read and analyze one instruction file.
+
+    A file that cannot be read or decoded yields an error entry, in the same
+    shape as analyze()'s parse errors, instead of failing the whole batch.
+    """
+    try:
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8")
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return {"file": path, "error": "read_error", "details": [f"{path}: {e}"]}
+    return analyze(
+        text,
+        num_invocations=num_invocations,
+        session_state_changes=session_state_changes,
+        exact=exact,
+    )
+
+
+def analyze_batch(
+    paths: list[str],
+    num_invocations: int = 10,
+    session_state_changes: int = 1,
+    exact: bool = False,
+) -> list[dict]:
+    """
+    analyze() every file in `paths` across a process pool, one worker per
+    core; results are returned in `paths` order.  Parsing and counting are
+    CPU-bound, so separate processes sidestep the GIL.
+    """
+    if not paths:
+        return []
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    worker = partial(
+        _analyze_file,
+        num_invocations=num_invocations,
+        session_state_changes=session_state_changes,
+        exact=exact,
+    )
+    with ProcessPoolExecutor(
+        max_workers=min(len(paths), os.cpu_count() or 1),
+        initializer=_warm_tiktoken if exact else None,
+    ) as pool:
+        return list(pool.map(worker, paths))
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -585,38 +809,75 @@ def main():
     if "--test" in args:
         sys.exit(run_tests())
 
-    # Parse flags
+    # Parse flags in a single pass over argv
     invocations = 10
     session_changes = 1
-    exact = "--exact" in args
-    json_output = "--json" in args
-
-    if "--invocations" in args:
-        idx = args.index("--invocations")
-        try:
-            invocations = int(args[idx + 1])
-        except (IndexError, ValueError):
-            print("Error: --invocations requires an integer argument", file=sys.stderr)
+    exact = False
+    json_output = False
+    batch_dir = None
+    file_args = []
+
+    it = iter(args)
+    for arg in it:
+        if arg in ("--invocations", "--session-changes"):
+            try:
+                value = int(next(it))
+            except (StopIteration, ValueError):
+                print(f"Error: {arg} requires an integer argument", file=sys.stderr)
+                sys.exit(2)
+            if arg == "--invocations":
+                invocations = value
+            else:
+                session_changes = value
+        elif arg == "--batch":
+            batch_dir = next(it, None)
+            if batch_dir is None:
+                print("Error: --batch requires a directory argument", file=sys.stderr)
+                sys.exit(2)
+        elif arg == "--exact":
+            exact = True
+        elif arg == "--json":
+            json_output = True
+        elif not arg.startswith("--"):
+            file_args.append(arg)
+
+    if batch_dir is not None:
+        if not os.path.isdir(batch_dir):
+            print(f"Error: directory not found: {batch_dir}", file=sys.stderr)
             sys.exit(2)
-
-    if "--session-changes" in args:
-        idx = args.index("--session-changes")
-        try:
-            session_changes = int(args[idx + 1])
-        except (IndexError, ValueError):
-            print("Error: --session-changes requires an integer argument", file=sys.stderr)
+        paths = sorted(
+            os.path.join(batch_dir, name)
+            for name in os.listdir(batch_dir)
+            if name.endswith(".ics")
+        )
+        if not paths:
+            print(f"Error: no .ics files in {batch_dir}", file=sys.stderr)
             sys.exit(2)
 
-    # Find the file argument (first non-flag arg)
-    file_args = [a for a in args if not a.startswith("--")]
+        results = analyze_batch(paths, invocations, session_changes, exact)
+
+        # Reports are gathered from the workers and written by this process
+        if json_output:
+            json.dump(
+                [{"file": path, **result} for path, result in zip(paths, results)],
+                sys.stdout,
+                indent=2,
+            )
+            sys.stdout.write("\n")
+        else:
+            for path, result in zip(paths, results):
+                print_report(result, label=path)
+        return
+
+    # The file argument is the first non-flag arg
     if not file_args:
         print("Error: provide an instruction file path", file=sys.stderr)
         sys.exit(2)
 
     path = file_args[0]
     try:
-        with open(path) as f:
-            text = f.read()
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8")
     except FileNotFoundError:
         print(f"Error: file not found: {path}", file=sys.stderr)
         sys.exit(2)
@@ -629,7 +890,8 @@ def main():
     )
 
     if json_output:
-        print(json.dumps(result, indent=2))
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
     else:
         print_report(result, label=path)
 
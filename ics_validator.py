@@ -18,6 +18,7 @@ import re
 import sys
 import json
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 
@@ -33,6 +34,9 @@ LAYER_ORDER = [
     "OUTPUT_CONTRACT",
 ]
 
+# For membership tests against the canonical layer names
+LAYER_ORDER_SET = frozenset(LAYER_ORDER)
+
 # Matches a well-formed directive line per the §3.2 scope grammar.
 # Groups: keyword, action, qualifier_keyword (opt), target (opt), condition (opt)
 DIRECTIVE_PATTERN = re.compile(
@@ -95,17 +99,35 @@ def _check_directive_grammar(line: str):
 
     return None
 
-OUTPUT_CONTRACT_FIELDS = {"format", "schema", "variance", "on_failure"}
+# Required OUTPUT_CONTRACT fields, in the order §3.5 lists them.
+OUTPUT_CONTRACT_FIELDS_ORDER = ("format", "schema", "variance", "on_failure")
+OUTPUT_CONTRACT_FIELDS = frozenset(OUTPUT_CONTRACT_FIELDS_ORDER)
+
+# An OUTPUT_CONTRACT "key:" line; _FIELD_VALUE_RE also captures the value.
+_FIELD_RE       = re.compile(r"([\w_]+)\s*:")
+_FIELD_VALUE_RE = re.compile(r"([\w_]+)\s*:\s*(.*)")
+
+# Markdown emphasis or heading markers in a BLOCKED: response.
+_MARKDOWN_RE = re.compile(r"\*\*|__|#{1,6} ")
 
 BOUNDARY_OPEN  = re.compile(r"^###ICS:([A-Z_]+)###\s*$")
 BOUNDARY_CLOSE = re.compile(r"^###END:([A-Z_]+)###\s*$")
 
+# Either boundary tag running to the end of a line of multi-line text (used by
+# parse_layers, which checks that the match also starts a line).  There is no
+# leading "^" so the regex engine can skip ahead on the literal "###" prefix.
+# Groups: kind ("ICS" or "END"), layer name.
+_BOUNDARY_TAG = re.compile(r"###(ICS|END):([A-Z_]+)###[^\S\n]*$", re.MULTILINE)
+
+# Line breaks other than "\n" that str.splitlines() also splits on.
+_OTHER_LINE_BREAKS = ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
 
 # ---------------------------------------------------------------------------
 # Result types
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Violation:
     step: int
     rule: str
@@ -115,7 +137,7 @@ class Violation:
         return f"  [Step {self.step}] {self.rule}: {self.message}"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     compliant: bool
     violations: list[Violation] = field(default_factory=list)
@@ -153,17 +175,41 @@ class ValidationResult:
             "warnings": self.warnings,
         }
 
+    def to_json(self) -> str:
+        """Indented JSON of to_dict(), for --json output; uses orjson if installed."""
+        try:
+            import orjson
+        except ImportError:
+            return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2).decode()
+
 
 # ---------------------------------------------------------------------------
 # Parser
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Layer:
     name: str
     content: str
     start_line: int
     end_line: int
+    _lines: Optional[list[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name, value):
+        # Reassigning content drops the cached split
+        if name == "content":
+            object.__setattr__(self, "_lines", None)
+        object.__setattr__(self, name, value)
+
+    @property
+    def content_lines(self) -> list[str]:
+        """`content.splitlines()`, split on first use and shared by every step."""
+        if self._lines is None:
+            self._lines = self.content.splitlines()
+        return self._lines
 
 
 def parse_layers(text: str) -> tuple[list[Layer], list[str]]:
@@ -171,55 +217,72 @@ def parse_layers(text: str) -> tuple[list[Layer], list[str]]:
     Extract layers from instruction text.
     Returns (layers, parse_errors).
     Parse errors are structural problems that prevent further validation.
+    Any line-ending style is accepted, so callers can read files in binary.
     """
+    # Boundary lines are located with one C-level scan; layer content is
+    # sliced straight out of `text` rather than rebuilt line by line.
+    if any(brk in text for brk in _OTHER_LINE_BREAKS):
+        text = "\n".join(text.splitlines())
+
     layers = []
     errors = []
-    lines = text.splitlines()
 
     open_layer: Optional[str] = None
     open_line: int = 0
-    content_lines: list[str] = []
+    content_parts: list[str] = []
+    content_start: int = 0
 
-    for i, line in enumerate(lines, start=1):
-        open_match  = BOUNDARY_OPEN.match(line)
-        close_match = BOUNDARY_CLOSE.match(line)
+    line_no = 1
+    scanned = 0
 
-        if open_match:
-            layer_name = open_match.group(1)
+    for match in _BOUNDARY_TAG.finditer(text):
+        start = match.start()
+        if start and text[start - 1] != "\n":
+            continue
+        line_no += text.count("\n", scanned, start)
+        scanned = start
+        kind, layer_name = match.groups()
+
+        if kind == "ICS":
             if open_layer is not None:
                 errors.append(
-                    f"Line {i}: opened ###ICS:{layer_name}### "
+                    f"Line {line_no}: opened ###ICS:{layer_name}### "
                     f"before ###END:{open_layer}### was seen"
                 )
             else:
-                open_layer   = layer_name
-                open_line    = i
-                content_lines = []
+                open_layer    = layer_name
+                open_line     = line_no
+                content_parts = []
+                content_start = match.end() + 1
+                continue
 
-        elif close_match:
-            layer_name = close_match.group(1)
-            if open_layer is None:
-                errors.append(
-                    f"Line {i}: ###END:{layer_name}### "
-                    f"found without matching ###ICS:{layer_name}###"
-                )
-            elif layer_name != open_layer:
-                errors.append(
-                    f"Line {i}: ###END:{layer_name}### "
-                    f"does not match open layer {open_layer}"
-                )
-            else:
-                layers.append(Layer(
-                    name=open_layer,
-                    content="\n".join(content_lines).strip(),
-                    start_line=open_line,
-                    end_line=i,
-                ))
-                open_layer    = None
-                content_lines = []
-
-        elif open_layer is not None:
-            content_lines.append(line)
+        elif open_layer is None:
+            errors.append(
+                f"Line {line_no}: ###END:{layer_name}### "
+                f"found without matching ###ICS:{layer_name}###"
+            )
+            continue
+
+        elif layer_name != open_layer:
+            errors.append(
+                f"Line {line_no}: ###END:{layer_name}### "
+                f"does not match open layer {open_layer}"
+            )
+
+        else:
+            content_parts.append(text[content_start:start])
+            layers.append(Layer(
+                name=open_layer,
+                content="".join(content_parts).strip(),
+                start_line=open_line,
+                end_line=line_no,
+            ))
+            open_layer = None
+            continue
+
+        # A stray boundary line inside an open layer is not part of its content.
+        content_parts.append(text[content_start:start])
+        content_start = match.end() + 1
 
     if open_layer is not None:
         errors.append(
@@ -230,6 +293,29 @@ def parse_layers(text: str) -> tuple[list[Layer], list[str]]:
     return layers, errors
 
 
+@lru_cache(maxsize=32)
+def _parse_layer_fields(
+    text: str,
+) -> tuple[tuple[tuple[str, str, int, int], ...], tuple[str, ...]]:
+    """parse_layers() memoized as plain, immutable field tuples."""
+    layers, errors = parse_layers(text)
+    return (
+        tuple((l.name, l.content, l.start_line, l.end_line) for l in layers),
+        tuple(errors),
+    )
+
+
+def _parse_layers_cached(text: str) -> tuple[list[Layer], list[str]]:
+    """
+    parse_layers() for repeated calls on the same text, e.g. one ICS document
+    checked against many LLM outputs.  The parse itself is shared, but every
+    call gets fresh Layer objects and lists, so a caller that modifies them
+    cannot affect a later call.
+    """
+    fields, errors = _parse_layer_fields(text)
+    return [Layer(*f) for f in fields], list(errors)
+
+
 # ---------------------------------------------------------------------------
 # Output contract types, parsers, and validators
 # ---------------------------------------------------------------------------
@@ -252,7 +338,7 @@ def _parse_output_contract_fields(content: str) -> dict:
     current_lines: list[str] = []
 
     for line in content.splitlines():
-        key_match = re.match(r"^([\w_]+)\s*:\s*(.*)", line)
+        key_match = _FIELD_VALUE_RE.match(line)
         if key_match:
             if current_key is not None:
                 fields[current_key] = "\n".join(current_lines).strip()
@@ -275,7 +361,7 @@ def parse_output_contract(
     Extract and return the OUTPUT_CONTRACT from an ICS document.
     Returns (OutputContract, []) on success or (None, [errors]) on failure.
     """
-    layers, parse_errors = parse_layers(ics_text)
+    layers, parse_errors = _parse_layers_cached(ics_text)
     if parse_errors:
         return None, parse_errors
 
@@ -285,10 +371,10 @@ def parse_output_contract(
 
     fields = _parse_output_contract_fields(oc_layers[0].content)
 
-    missing = OUTPUT_CONTRACT_FIELDS - set(fields.keys())
+    missing = [f for f in OUTPUT_CONTRACT_FIELDS_ORDER if f not in fields]
     if missing:
         return None, [
-            f"OUTPUT_CONTRACT is missing required field(s): {', '.join(sorted(missing))}"
+            f"OUTPUT_CONTRACT is missing required field(s): {', '.join(missing)}"
         ]
 
     return OutputContract(
@@ -352,7 +438,7 @@ def _validate_blocked_response(
         or "no bold" in on_failure_lower
         or "no bold asterisks" in on_failure_lower
     )
-    if prohibits_markdown and re.search(r"\*\*|__|#{1,6} ", output):
+    if prohibits_markdown and _MARKDOWN_RE.search(output):
         result.add_violation(
             0,
             "OUTPUT_CONTRACT on_failure",
@@ -412,16 +498,29 @@ def validate_output(ics_text: str, llm_output: str) -> ValidationResult:
 # Validation steps
 # ---------------------------------------------------------------------------
 
-def step1_all_layers_present(layers: list[Layer], result: ValidationResult):
+# Each step takes an optional `by_name` — the layers grouped by name, as
+# built once by validate() — and derives it from `layers` when omitted.
+
+def layers_by_name(layers: list[Layer]) -> dict[str, list[Layer]]:
+    """Group layers by name, keeping document order within each name."""
+    by_name: dict[str, list[Layer]] = {}
+    for layer in layers:
+        by_name.setdefault(layer.name, []).append(layer)
+    return by_name
+
+
+def step1_all_layers_present(
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
+):
     """Step 1: All five layer boundary tags are present and well-formed."""
-    found_names = {l.name for l in layers}
+    found_names = set(by_name if by_name is not None else layers_by_name(layers))
     for name in LAYER_ORDER:
         if name not in found_names:
             result.add_violation(
                 1, "§5.2 Step 1",
                 f"Required layer {name} is missing"
             )
-    unknown = found_names - set(LAYER_ORDER)
+    unknown = found_names - LAYER_ORDER_SET
     for name in unknown:
         result.add_violation(
             1, "§3.6",
@@ -430,29 +529,60 @@ def step1_all_layers_present(layers: list[Layer], result: ValidationResult):
         )
 
 
-def step2_canonical_order(layers: list[Layer], result: ValidationResult):
+def step2_canonical_order(
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
+):
     """Step 2: Layers appear in canonical order."""
-    seen = [l.name for l in layers if l.name in LAYER_ORDER]
-    expected = [name for name in LAYER_ORDER if name in {l.name for l in layers}]
-
-    if seen != expected:
-        result.add_violation(
-            2, "§4.1",
-            f"Layers are out of order. "
-            f"Found: {', '.join(seen)}. "
-            f"Expected: {', '.join(expected)}"
-        )
+    # Canonical layers are in order exactly when their positions in
+    # LAYER_ORDER strictly increase (a repeated name also breaks the order).
+    # The Found/Expected lists are only built for the violation message.
+    last = -1
+    for l in layers:
+        if l.name not in LAYER_ORDER_SET:
+            continue
+        rank = LAYER_ORDER.index(l.name)
+        if rank <= last:
+            break
+        last = rank
+    else:
+        return
+
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    seen = [l.name for l in layers if l.name in LAYER_ORDER_SET]
+    expected = [name for name in LAYER_ORDER if name in by_name]
+    result.add_violation(
+        2, "§4.1",
+        f"Layers are out of order. "
+        f"Found: {', '.join(seen)}. "
+        f"Expected: {', '.join(expected)}"
+    )
 
 
-def step3_session_state_clear(layers: list[Layer], result: ValidationResult):
+def step3_session_state_clear(
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
+):
     """
     Step 3: SESSION_STATE, if containing CLEAR, contains no other content.
     """
-    ss_layers = [l for l in layers if l.name == "SESSION_STATE"]
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    ss_layers = by_name.get("SESSION_STATE", ())
     for layer in ss_layers:
-        content_lines = [ln.strip() for ln in layer.content.splitlines() if ln.strip()]
-        has_clear = any(ln == "CLEAR" for ln in content_lines)
-        if has_clear and len(content_lines) > 1:
+        # One pass over the non-blank lines, stopping as soon as CLEAR has
+        # been seen together with any second line.
+        has_clear = False
+        non_blank = 0
+        for ln in layer.content_lines:
+            stripped = ln.strip()
+            if not stripped:
+                continue
+            non_blank += 1
+            if stripped == "CLEAR":
+                has_clear = True
+            if has_clear and non_blank > 1:
+                break
+        if has_clear and non_blank > 1:
             result.add_violation(
                 3, "§3.3",
                 "SESSION_STATE contains CLEAR alongside other content. "
@@ -460,39 +590,50 @@ def step3_session_state_clear(layers: list[Layer], result: ValidationResult):
             )
 
 
-def step4_no_redefinition(layers: list[Layer], result: ValidationResult):
+def step4_no_redefinition(
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
+):
     """
     Step 4: No layer restates, redefines, or contradicts a preceding layer.
     This step performs heuristic checks where rules are mechanically enforceable.
     Full semantic contradiction checking requires human review.
     """
-    layer_map = {l.name: l for l in layers}
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    # The last layer of each name, as a {name: layer} map would keep
+    layer_map = {name: group[-1] for name, group in by_name.items()}
 
     # Check TASK_PAYLOAD does not override CAPABILITY_DECLARATION
     # by embedding ALLOW/DENY/REQUIRE directives
     if "TASK_PAYLOAD" in layer_map:
         tp = layer_map["TASK_PAYLOAD"]
-        for line in tp.content.splitlines():
-            if DIRECTIVE_PATTERN.match(line):
+        for line in tp.content_lines:
+            # Stripped once, and matched the same way step 5 matches lines
+            stripped = line.strip()
+            if stripped and DIRECTIVE_PATTERN.match(stripped):
                 result.add_violation(
                     4, "§3.4 / §4.2",
-                    f"TASK_PAYLOAD contains a capability directive: '{line.strip()}'. "
+                    f"TASK_PAYLOAD contains a capability directive: '{stripped}'. "
                     f"Directives belong in CAPABILITY_DECLARATION."
                 )
 
     # Check SESSION_STATE does not redefine IMMUTABLE_CONTEXT
     # by heuristically checking for identical key lines
     if "IMMUTABLE_CONTEXT" in layer_map and "SESSION_STATE" in layer_map:
-        ic_lines = {
-            ln.strip().lower()
-            for ln in layer_map["IMMUTABLE_CONTEXT"].content.splitlines()
-            if ":" in ln and ln.strip()
-        }
         ss_lines = [
             ln.strip()
-            for ln in layer_map["SESSION_STATE"].content.splitlines()
+            for ln in layer_map["SESSION_STATE"].content_lines
             if ":" in ln and ln.strip() and ln.strip() != "CLEAR"
         ]
+        # Most SESSION_STATE layers (e.g. a bare CLEAR) have no key lines,
+        # in which case IMMUTABLE_CONTEXT need not be scanned at all.
+        if not ss_lines:
+            return
+        ic_lines = {
+            ln.strip().lower()
+            for ln in layer_map["IMMUTABLE_CONTEXT"].content_lines
+            if ":" in ln and ln.strip()
+        }
         for ss_line in ss_lines:
             if ss_line.lower() in ic_lines:
                 result.add_violation(
@@ -503,7 +644,7 @@ def step4_no_redefinition(layers: list[Layer], result: ValidationResult):
 
 
 def step5_capability_declaration_syntax(
-    layers: list[Layer], result: ValidationResult
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
 ):
     """
     Step 5: CAPABILITY_DECLARATION uses only ALLOW, DENY, or REQUIRE directives.
@@ -511,9 +652,11 @@ def step5_capability_declaration_syntax(
     Also enforces the §3.2 scope grammar: qualifier keywords must be followed
     by a non-empty target; IF must be followed by a non-empty condition.
     """
-    cd_layers = [l for l in layers if l.name == "CAPABILITY_DECLARATION"]
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    cd_layers = by_name.get("CAPABILITY_DECLARATION", ())
     for layer in cd_layers:
-        for line in layer.content.splitlines():
+        for line in layer.content_lines:
             stripped = line.strip()
             if not stripped:
                 continue
@@ -535,7 +678,9 @@ def step5_capability_declaration_syntax(
                 )
 
 
-def step7_allow_deny_overlap(layers: list[Layer], result: ValidationResult):
+def step7_allow_deny_overlap(
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
+):
     """
     Step 7: Warn when a DENY directive's WITHIN target is a path prefix of an
     ALLOW directive's WITHIN target (or equal to it).
@@ -551,12 +696,14 @@ def step7_allow_deny_overlap(layers: list[Layer], result: ValidationResult):
     The ALLOW target 'infra/migrations/' starts with the DENY target 'infra/',
     so a warning is emitted.
     """
-    cd_layers = [l for l in layers if l.name == "CAPABILITY_DECLARATION"]
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    cd_layers = by_name.get("CAPABILITY_DECLARATION", ())
     for layer in cd_layers:
         allows_with: list[tuple[str, str]] = []   # (directive line, WITHIN target)
         denys_with:  list[tuple[str, str]] = []
 
-        for line in layer.content.splitlines():
+        for line in layer.content_lines:
             stripped = line.strip()
             if not stripped or stripped.startswith("#"):
                 continue
@@ -606,22 +753,25 @@ def step7_allow_deny_overlap(layers: list[Layer], result: ValidationResult):
 
 
 def step6_output_contract_fields(
-    layers: list[Layer], result: ValidationResult
+    layers: list[Layer], result: ValidationResult, by_name: Optional[dict] = None
 ):
     """
     Step 6: OUTPUT_CONTRACT contains all four required fields.
     Fields are detected by key: value patterns at the start of a line.
     """
-    oc_layers = [l for l in layers if l.name == "OUTPUT_CONTRACT"]
+    if by_name is None:
+        by_name = layers_by_name(layers)
+    oc_layers = by_name.get("OUTPUT_CONTRACT", ())
     for layer in oc_layers:
         found_fields = set()
-        for line in layer.content.splitlines():
+        for line in layer.content_lines:
             stripped = line.strip()
-            match = re.match(r"^([\w_]+)\s*:", stripped)
+            match = _FIELD_RE.match(stripped)
             if match:
                 found_fields.add(match.group(1).lower())
-        missing = OUTPUT_CONTRACT_FIELDS - found_fields
-        for f in sorted(missing):
+        for f in OUTPUT_CONTRACT_FIELDS_ORDER:
+            if f in found_fields:
+                continue
             result.add_violation(
                 6, "§3.5",
                 f"OUTPUT_CONTRACT is missing required field: '{f}'"
@@ -635,24 +785,33 @@ def step6_output_contract_fields(
 def validate(text: str) -> ValidationResult:
     result = ValidationResult(compliant=True)
 
-    layers, parse_errors = parse_layers(text)
+    layers, parse_errors = _parse_layers_cached(text)
 
     if parse_errors:
-        for err in parse_errors:
-            result.add_violation(1, "§3.6 (parse error)", err)
+        result.violations.extend(
+            Violation(1, "§3.6 (parse error)", err) for err in parse_errors
+        )
+        result.compliant = False
         # Cannot proceed reliably past step 1 if parsing failed
         return result
 
-    step1_all_layers_present(layers, result)
-    if not result.compliant:
-        return result
+    # Grouped once here and shared by every step
+    by_name = layers_by_name(layers)
 
-    step2_canonical_order(layers, result)
-    step3_session_state_clear(layers, result)
-    step4_no_redefinition(layers, result)
-    step5_capability_declaration_syntax(layers, result)
-    step6_output_contract_fields(layers, result)
-    step7_allow_deny_overlap(layers, result)
+    # The common case -- exactly the five layers, in canonical order --
+    # cannot fail steps 1 or 2, so those are only run otherwise.
+    if [l.name for l in layers] != LAYER_ORDER:
+        step1_all_layers_present(layers, result, by_name)
+        if not result.compliant:
+            return result
+
+        step2_canonical_order(layers, result, by_name)
+
+    step3_session_state_clear(layers, result, by_name)
+    step4_no_redefinition(layers, result, by_name)
+    step5_capability_declaration_syntax(layers, result, by_name)
+    step6_output_contract_fields(layers, result, by_name)
+    step7_allow_deny_overlap(layers, result, by_name)
 
     return result
 
@@ -1025,6 +1184,133 @@ def run_output_tests() -> int:
     return 0 if failed == 0 else 1
 
 
+# parse_layers cases: expect_layers lists (name, content, start_line, end_line);
+# expect_errors lists one substring per expected parse error, in order.
+PARSE_TESTS = [
+    {
+        "name": "Trailing whitespace after boundary tags is ignored",
+        "input": "###ICS:TASK_PAYLOAD###  \t\nbody\n###END:TASK_PAYLOAD### \n",
+        "expect_layers": [("TASK_PAYLOAD", "body", 1, 3)],
+        "expect_errors": [],
+    },
+    {
+        "name": "CRLF line endings",
+        "input": "###ICS:TASK_PAYLOAD###\r\nline one\r\nline two\r\n###END:TASK_PAYLOAD###\r\n",
+        "expect_layers": [("TASK_PAYLOAD", "line one\nline two", 1, 4)],
+        "expect_errors": [],
+    },
+    {
+        "name": "Other line breaks (CR, form feed, U+2028) split lines",
+        "input": "###ICS:TASK_PAYLOAD###\rx\u2028y\x0c###END:TASK_PAYLOAD###",
+        "expect_layers": [("TASK_PAYLOAD", "x\ny", 1, 4)],
+        "expect_errors": [],
+    },
+    {
+        "name": "Tags that do not fill their line are content",
+        "input": (
+            "###ICS:TASK_PAYLOAD###\n"
+            "see ###END:TASK_PAYLOAD### here\n"
+            "  ###ICS:OUTPUT_CONTRACT###\n"
+            "###END:TASK_PAYLOAD### trailing text\n"
+            "###END:TASK_PAYLOAD###"
+        ),
+        "expect_layers": [(
+            "TASK_PAYLOAD",
+            "see ###END:TASK_PAYLOAD### here\n"
+            "  ###ICS:OUTPUT_CONTRACT###\n"
+            "###END:TASK_PAYLOAD### trailing text",
+            1, 5,
+        )],
+        "expect_errors": [],
+    },
+    {
+        "name": "Nested opening tag is an error and not content",
+        "input": "###ICS:TASK_PAYLOAD###\nx\n###ICS:SESSION_STATE###\ny\n###END:TASK_PAYLOAD###",
+        "expect_layers": [("TASK_PAYLOAD", "x\ny", 1, 5)],
+        "expect_errors": ["Line 3: opened ###ICS:SESSION_STATE### before ###END:TASK_PAYLOAD###"],
+    },
+    {
+        "name": "Mismatched closing tag is an error",
+        "input": "###ICS:TASK_PAYLOAD###\n###END:SESSION_STATE###\n###END:TASK_PAYLOAD###",
+        "expect_layers": [("TASK_PAYLOAD", "", 1, 3)],
+        "expect_errors": ["Line 2: ###END:SESSION_STATE### does not match open layer TASK_PAYLOAD"],
+    },
+    {
+        "name": "Closing tag without an open layer is an error",
+        "input": "text\n###END:TASK_PAYLOAD###",
+        "expect_layers": [],
+        "expect_errors": ["Line 2: ###END:TASK_PAYLOAD### found without matching"],
+    },
+    {
+        "name": "Unterminated layer is an error",
+        "input": "\n###ICS:TASK_PAYLOAD###\nno close tag",
+        "expect_layers": [],
+        "expect_errors": ["Layer TASK_PAYLOAD opened at line 2 but ###END:TASK_PAYLOAD### was never found"],
+    },
+]
+
+
+def run_parse_tests() -> int:
+    passed = 0
+    failed = 0
+
+    print("Running ICS layer parser test suite...\n")
+
+    def check(name: str, ok: bool, details: list[str]):
+        nonlocal passed, failed
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+        if ok:
+            passed += 1
+        else:
+            for line in details:
+                print(f"         {line}")
+            failed += 1
+
+    for test in PARSE_TESTS:
+        layers, errors = parse_layers(test["input"])
+        found = [(l.name, l.content, l.start_line, l.end_line) for l in layers]
+        ok = (
+            found == test["expect_layers"]
+            and len(errors) == len(test["expect_errors"])
+            and all(sub in err for sub, err in zip(test["expect_errors"], errors))
+        )
+        check(test["name"], ok, [
+            f"Expected layers: {test['expect_layers']}",
+            f"Found layers:    {found}",
+            f"Expected errors: {test['expect_errors']}",
+            f"Found errors:    {errors}",
+        ])
+
+    # The memoized parse must hand out independent results: modifying one
+    # cannot leak into a later call on the same text.
+    layers, errors = _parse_layers_cached(COMPLIANT_EXAMPLE)
+    expected = [(l.name, l.content) for l in layers]
+    layers[0].content = "corrupted"
+    layers.pop()
+    errors.append("corrupted")
+    again, again_errors = _parse_layers_cached(COMPLIANT_EXAMPLE)
+    found = [(l.name, l.content) for l in again]
+    check(
+        "Mutating a cached parse result does not affect later calls",
+        found == expected and again_errors == [] and validate(COMPLIANT_EXAMPLE).compliant,
+        [f"Expected layers: {expected}", f"Found layers:    {found}",
+         f"Found errors:    {again_errors}"],
+    )
+
+    # content_lines is cached on the layer, so it must follow a reassignment
+    layer = Layer("TASK_PAYLOAD", "first\nsecond", 1, 4)
+    before = list(layer.content_lines)
+    layer.content = "replaced"
+    check(
+        "content_lines follows a reassigned content",
+        before == ["first", "second"] and layer.content_lines == ["replaced"],
+        [f"Before: {before}", f"After:  {layer.content_lines}"],
+    )
+
+    print(f"\n{passed}/{passed + failed} tests passed.")
+    return 0 if failed == 0 else 1
+
+
 def run_tests() -> int:
     passed = 0
     failed = 0
@@ -1084,16 +1370,18 @@ def main():
         rc1 = run_tests()
         print()
         rc2 = run_output_tests()
-        sys.exit(0 if (rc1 == 0 and rc2 == 0) else 1)
+        print()
+        rc3 = run_parse_tests()
+        sys.exit(0 if (rc1 == 0 and rc2 == 0 and rc3 == 0) else 1)
 
     if "--stdin" in args:
-        text = sys.stdin.read()
+        text = sys.stdin.buffer.read().decode("utf-8")
     else:
         path = args[0]
         json_output = "--json" in args
         try:
-            with open(path) as f:
-                text = f.read()
+            with open(path, "rb") as f:
+                text = f.read().decode("utf-8")
         except FileNotFoundError:
             print(f"Error: file not found: {path}", file=sys.stderr)
             sys.exit(2)
@@ -1102,7 +1390,7 @@ def main():
     result = validate(text)
 
     if json_output:
-        print(json.dumps(result.to_dict(), indent=2))
+        print(result.to_json())
     else:
         print(result.report())
 
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Test suite for ics_live_test (offline parts only — no API calls).
+
+Covers:
+  • run_invocations() — invocation 1 first, the concurrency cap, copied naive
+    rows, progress reports and the sequential dry run
+  • with_result_cache() — hit, miss per approach and invocation, TTL expiry
+  • _reset_seconds() — duration strings, RFC 3339 timestamps, garbage input
+  • RateLimitPacer — wait calculation against a fake clock and sleep
+
+Usage:
+    python test_ics_live_test.py
+    python test_ics_live_test.py -v
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest.mock import patch
+
+from ics_live_test import (
+    MAX_PACE_SECONDS,
+    InvocationUsage,
+    RateLimitPacer,
+    _reset_seconds,
+    run_invocations,
+    with_result_cache,
+)
+
+
+# ---------------------------------------------------------------------------
+# 1. run_invocations()
+# ---------------------------------------------------------------------------
+
+class TestRunInvocations(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.events: list[tuple[str, int, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.threads: set[int] = set()
+        self.previews: list = []
+
+    def call_fn(self, client, model, system, invocation, approach, dry_run, preview=None):
+        with self.lock:
+            self.events.append(("start", invocation, approach))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.threads.add(threading.get_ident())
+            self.previews.append(preview)
+        time.sleep(0.01)
+        with self.lock:
+            self.events.append(("end", invocation, approach))
+            self.in_flight -= 1
+        return InvocationUsage(
+            invocation=invocation,
+            approach=approach,
+            input_tokens=1000 * invocation + (1 if approach == "ics" else 2),
+            output_tokens=5,
+        )
+
+    def _run(self, n, dry_run=False, **kwargs):
+        return asyncio.run(run_invocations(
+            self.call_fn, None, "model", "naive system", "ics system",
+            n, dry_run, **kwargs,
+        ))
+
+    def test_invocation_one_finishes_before_the_rest_start(self):
+        self._run(6)
+        first_later_start = min(
+            k for k, (kind, i, _) in enumerate(self.events) if kind == "start" and i > 1
+        )
+        ends_of_one = [
+            k for k, (kind, i, _) in enumerate(self.events) if kind == "end" and i == 1
+        ]
+        self.assertEqual(len(ends_of_one), 2)
+        self.assertLess(max(ends_of_one), first_later_start)
+
+    def test_in_flight_calls_never_exceed_concurrency(self):
+        self._run(12, concurrency=3)
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertGreater(self.max_in_flight, 1)
+        self.assertEqual(len(self.events), 2 * 2 * 12)
+
+    def test_results_are_in_invocation_order(self):
+        naive, ics = self._run(5, concurrency=4)
+        self.assertEqual([u.invocation for u in naive], [1, 2, 3, 4, 5])
+        self.assertEqual([u.invocation for u in ics], [1, 2, 3, 4, 5])
+        self.assertTrue(all(u.approach == "naive" for u in naive))
+        self.assertTrue(all(u.approach == "ics" for u in ics))
+
+    def test_naive_rows_after_naive_calls_are_copies(self):
+        naive, ics = self._run(5, naive_calls=2)
+        sent = sorted(i for kind, i, a in self.events if kind == "start" and a == "naive")
+        self.assertEqual(sent, [1, 2])
+        self.assertEqual([u.invocation for u in naive], [1, 2, 3, 4, 5])
+        for u in naive[2:]:
+            self.assertEqual(u.input_tokens, naive[1].input_tokens)
+            self.assertEqual(u.approach, "naive")
+        self.assertEqual([u.input_tokens for u in ics], [1001, 2001, 3001, 4001, 5001])
+
+    def test_report_gets_each_pair_once(self):
+        reported = []
+        self._run(4, naive_calls=1, report=lambda u, v: reported.append((u, v)))
+        self.assertEqual(sorted(u.invocation for u, _ in reported), [1, 2, 3, 4])
+        for u, v in reported:
+            self.assertEqual(u.invocation, v.invocation)
+        self.assertEqual(reported[0][0].invocation, 1)
+
+    def test_dry_run_is_sequential(self):
+        captured = StringIO()
+        with patch("sys.stdout", captured):
+            naive, ics = self._run(3, dry_run=True, naive_calls=1, concurrency=8)
+        self.assertEqual(self.max_in_flight, 1)
+        self.assertEqual(self.threads, {threading.get_ident()})
+        self.assertEqual(
+            [(i, a) for kind, i, a in self.events if kind == "start"],
+            [(1, "naive"), (1, "ics"), (2, "ics"), (3, "ics")],
+        )
+        self.assertTrue(all(p is not None for p in self.previews))
+        self.assertEqual(
+            captured.getvalue(),
+            "".join(f"  Invocation {i}/3... (dry run)\n" for i in range(1, 4)),
+        )
+        self.assertEqual([u.invocation for u in naive], [1, 2, 3])
+
+
+# ---------------------------------------------------------------------------
+# 2. with_result_cache()
+# ---------------------------------------------------------------------------
+
+class TestResultCache(unittest.TestCase):
+
+    SYSTEM = "same system prompt for both approaches"
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.calls: list[tuple[int, str]] = []
+
+        def call_fn(client, model, system, invocation, approach, dry_run, preview=None):
+            self.calls.append((invocation, approach))
+            return InvocationUsage(
+                invocation=invocation,
+                approach=approach,
+                input_tokens=100 * len(self.calls),
+                output_tokens=5,
+            )
+
+        self.cached = with_result_cache(call_fn, "openai", self._tmp.name, ttl=300)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _call(self, invocation: int, approach: str) -> InvocationUsage:
+        return self.cached(None, "gpt-4o-mini", self.SYSTEM, invocation, approach, False)
+
+    def _age_entries(self, seconds: float):
+        then = time.time() - seconds
+        for name in os.listdir(self._tmp.name):
+            os.utime(os.path.join(self._tmp.name, name), (then, then))
+
+    def test_repeat_call_is_a_hit(self):
+        first  = self._call(2, "ics")
+        second = self._call(2, "ics")
+        self.assertEqual(self.calls, [(2, "ics")])
+        self.assertEqual(second, first)
+
+    def test_approaches_do_not_share_an_entry(self):
+        naive = self._call(2, "naive")
+        ics   = self._call(2, "ics")
+        self.assertEqual(self.calls, [(2, "naive"), (2, "ics")])
+        self.assertNotEqual(naive.input_tokens, ics.input_tokens)
+        self.assertEqual(self._call(2, "naive").input_tokens, naive.input_tokens)
+
+    def test_invocations_do_not_share_an_entry(self):
+        self._call(2, "ics")
+        self._call(3, "ics")
+        self.assertEqual(self.calls, [(2, "ics"), (3, "ics")])
+
+    def test_invocation_one_always_calls_the_api(self):
+        self._call(1, "ics")
+        self._call(1, "ics")
+        self.assertEqual(self.calls, [(1, "ics"), (1, "ics")])
+
+    def test_expired_entry_is_a_miss(self):
+        self._call(2, "ics")
+        self._age_entries(301)
+        refreshed = self._call(2, "ics")
+        self.assertEqual(self.calls, [(2, "ics"), (2, "ics")])
+        self.assertEqual(refreshed.input_tokens, 200)
+        self.assertEqual(self._call(2, "ics").input_tokens, 200)
+
+
+# ---------------------------------------------------------------------------
+# 3. _reset_seconds()
+# ---------------------------------------------------------------------------
+
+class TestResetSeconds(unittest.TestCase):
+
+    def test_durations(self):
+        cases = {
+            "1s":      1.0,
+            "1.5s":    1.5,
+            "20ms":    0.02,
+            "6m0s":    360.0,
+            "1h2m3s":  3723.0,
+            " 30s\n":  30.0,
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertAlmostEqual(_reset_seconds(value), expected)
+
+    def test_rfc3339_timestamp(self):
+        reset_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        value = reset_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.assertAlmostEqual(_reset_seconds(value), 30, delta=2)
+
+    def test_naive_timestamp_is_utc(self):
+        reset_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        value = reset_at.replace(tzinfo=None).isoformat()
+        self.assertAlmostEqual(_reset_seconds(value), 30, delta=2)
+
+    def test_past_timestamp_is_negative(self):
+        self.assertLess(_reset_seconds("2000-01-01T00:00:00Z"), 0)
+
+    def test_garbage_is_none(self):
+        for value in ("", "soon", "5 s", "1s later", "10x", "ms", "2025-13-45T00:00:00Z"):
+            with self.subTest(value=value):
+                self.assertIsNone(_reset_seconds(value))
+
+
+# ---------------------------------------------------------------------------
+# 4. RateLimitPacer
+# ---------------------------------------------------------------------------
+
+class TestRateLimitPacer(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.slept: list[float] = []
+
+        def sleep(seconds):
+            self.slept.append(seconds)
+            self.now += seconds
+
+        patches = [
+            patch("ics_live_test.time.monotonic", lambda: self.now),
+            patch("ics_live_test.time.sleep", sleep),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.pacer = RateLimitPacer(threshold=4)
+
+    def test_no_wait_without_observations(self):
+        self.pacer.wait()
+        self.assertEqual(self.slept, [])
+
+    def test_budget_at_threshold_does_not_pace(self):
+        self.pacer.observe("4", "10s")
+        self.pacer.wait()
+        self.assertEqual(self.slept, [])
+
+    def test_budget_below_threshold_waits_until_reset(self):
+        self.pacer.observe("3", "10s")
+        self.pacer.wait()
+        self.assertEqual(self.slept, [10.0])
+        self.pacer.wait()  # the window has passed on the fake clock
+        self.assertEqual(self.slept, [10.0])
+
+    def test_wait_accounts_for_elapsed_time(self):
+        self.pacer.observe("0", "10s")
+        self.now += 4
+        self.pacer.wait()
+        self.assertEqual(self.slept, [6.0])
+
+    def test_delay_is_capped(self):
+        self.pacer.observe("0", "1h")
+        self.pacer.wait()
+        self.assertEqual(self.slept, [MAX_PACE_SECONDS])
+
+    def test_shorter_hint_does_not_shorten_the_pause(self):
+        self.pacer.observe("0", "10s")
+        self.pacer.observe("0", "2s")
+        self.pacer.wait()
+        self.assertEqual(self.slept, [10.0])
+
+    def test_unusable_headers_are_ignored(self):
+        for remaining, reset in (
+            (None, "10s"), ("0", None), ("many", "10s"),
+            ("0", "whenever"), ("0", "0s"), ("0", "2000-01-01T00:00:00Z"),
+        ):
+            self.pacer.observe(remaining, reset)
+        self.pacer.wait()
+        self.assertEqual(self.slept, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
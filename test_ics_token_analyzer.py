@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test suite for ics_token_analyzer.
+
+Covers:
+  • _count_tokens_ascii() — matches _TOKEN_SPLIT.findall on ASCII text
+  • analyze_batch() — per-file error entries for empty, non-UTF-8 and
+    malformed files; an empty path list
+  • CLI --batch — text and --json output name every file, including failures
+
+Usage:
+    python test_ics_token_analyzer.py
+    python test_ics_token_analyzer.py -v
+"""
+
+import json
+import os
+import random
+import string
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from ics_token_analyzer import (
+    EXAMPLE_ANALYSIS,
+    EXAMPLE_REFACTORING,
+    _TOKEN_SPLIT,
+    _count_tokens_ascii,
+    analyze,
+    analyze_batch,
+    count_tokens_word_boundary,
+    main,
+)
+
+
+# ---------------------------------------------------------------------------
+# 1. ASCII word-boundary fast path
+# ---------------------------------------------------------------------------
+
+class TestAsciiWordBoundary(unittest.TestCase):
+
+    CASES = [
+        "",
+        "word",
+        "_",
+        "__init__",
+        "snake_case_name",
+        "_leading and trailing_",
+        "a_1",
+        "x = y_2 + 30_000",
+        "v1.2.3-rc4",
+        "12345 678\t\t90",
+        "!!! ?? ...",
+        "   \n\n\t  \r\n ",
+        "\x00\x01\x7f control bytes",
+        "{\"key\": [1, 2.5e-3, null]}",
+        "https://example.com/a_b?c=1&d=2#frag",
+        "ALLOW   file modification WITHIN src/orders/",
+        # The examples use em dashes; "?" stands in to keep them ASCII
+        EXAMPLE_REFACTORING.encode("ascii", "replace").decode(),
+        EXAMPLE_ANALYSIS.encode("ascii", "replace").decode(),
+    ]
+
+    def assertMatchesRegex(self, text: str):
+        expected = len(_TOKEN_SPLIT.findall(text))
+        self.assertEqual(_count_tokens_ascii(text), expected)
+        self.assertEqual(count_tokens_word_boundary(text), expected)
+
+    def test_fixed_cases(self):
+        for text in self.CASES:
+            with self.subTest(text=text[:40]):
+                self.assertMatchesRegex(text)
+
+    def test_random_ascii(self):
+        rng = random.Random(0)
+        alphabet = string.ascii_letters[:6] + "059" + "_" + " \t\n\r\x0b\x0c" + "#.-/(\x00\x7f"
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            with self.subTest(text=text):
+                self.assertMatchesRegex(text)
+
+    def test_every_ascii_pair(self):
+        chars = [chr(c) for c in range(128)]
+        for a in chars:
+            self.assertMatchesRegex("".join(a + b for b in chars))
+
+    def test_non_ascii_uses_the_regex(self):
+        for text in (EXAMPLE_REFACTORING, "naïve café — ok_2"):
+            self.assertEqual(
+                count_tokens_word_boundary(text), len(_TOKEN_SPLIT.findall(text))
+            )
+
+
+# ---------------------------------------------------------------------------
+# 2. --batch with a good, an empty, a non-UTF-8 and a malformed file
+# ---------------------------------------------------------------------------
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        self.good  = os.path.join(self.dir, "a_good.ics")
+        self.empty = os.path.join(self.dir, "b_empty.ics")
+        self.bad   = os.path.join(self.dir, "c_latin1.ics")
+        self.broken = os.path.join(self.dir, "d_unterminated.ics")
+        with open(self.good, "w", encoding="utf-8") as f:
+            f.write(EXAMPLE_REFACTORING)
+        open(self.empty, "wb").close()
+        with open(self.bad, "wb") as f:
+            f.write("###ICS:TASK_PAYLOAD###\ncafé\n".encode("latin-1"))
+        with open(self.broken, "w", encoding="utf-8") as f:
+            f.write("###ICS:TASK_PAYLOAD###\nno end marker\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _main(self, *extra: str) -> str:
+        captured = StringIO()
+        argv = ["ics-analyze", "--batch", self.dir, *extra]
+        with patch("sys.argv", argv), patch("sys.stdout", captured):
+            main()
+        return captured.getvalue()
+
+    def test_analyze_batch_returns_one_entry_per_file(self):
+        results = analyze_batch([self.good, self.empty, self.bad, self.broken])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0], analyze(EXAMPLE_REFACTORING))
+        self.assertEqual(results[1]["single_invocation_tokens"], 0)
+        self.assertEqual(results[2]["error"], "read_error")
+        self.assertEqual(results[2]["file"], self.bad)
+        self.assertIn(self.bad, results[2]["details"][0])
+        self.assertEqual(results[3]["error"], "parse_errors")
+
+    def test_analyze_batch_with_no_paths(self):
+        self.assertEqual(analyze_batch([]), [])
+
+    def test_text_report_covers_every_file(self):
+        out = self._main()
+        self.assertIn(self.good, out)
+        self.assertIn(self.empty, out)
+        self.assertIn("ERROR: read_error", out)
+        self.assertIn(self.bad, out)
+        self.assertIn("ERROR: parse_errors", out)
+        self.assertIn(self.broken, out)
+
+    def test_text_report_names_the_file_before_its_error(self):
+        out = self._main()
+        section = out[out.index(self.broken):]
+        self.assertIn("ERROR: parse_errors", section)
+        self.assertNotIn(self.good, section)
+
+    def test_json_report_covers_every_file(self):
+        data = json.loads(self._main("--json"))
+        self.assertEqual(
+            [entry["file"] for entry in data],
+            [self.good, self.empty, self.bad, self.broken],
+        )
+        self.assertNotIn("error", data[0])
+        self.assertNotIn("error", data[1])
+        self.assertEqual(data[2]["error"], "read_error")
+        self.assertEqual(data[3]["error"], "parse_errors")
+
+
+if __name__ == "__main__":
+    unittest.main()